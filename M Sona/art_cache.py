@@ -0,0 +1,125 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Qt, Signal
+from PySide6.QtGui import QImage, QPixmap
+
+from metadata import read_album_art
+
+CACHE_DIR = Path(__file__).parent / "cache" / "art"
+THUMBNAIL_SIZE = 600  # largest side of a cached cover, in pixels
+
+
+def art_key(data: bytes) -> str:
+    """Covers are keyed by content, so tracks sharing a cover share a cache entry"""
+    return hashlib.sha1(data).hexdigest()
+
+
+def load_thumbnail(path: str, cache_dir: Path = CACHE_DIR, size: int = THUMBNAIL_SIZE):
+    """
+    Return (key, QImage) for the cover of path, or (None, null image) when it has none.
+    The full-size cover is only decoded the first time a key is seen, later calls read the small thumbnail from disk.
+    """
+    data = read_album_art(path)
+    if not data:
+        return None, QImage()
+    key = art_key(data)
+    thumb_file = cache_dir / f"{key}.png"
+    image = QImage(str(thumb_file))
+    if not image.isNull():
+        return key, image
+
+    image = QImage()
+    if not image.loadFromData(data):
+        return None, image
+    if image.width() > size or image.height() > size:
+        image = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # write under a temporary name so a half-written thumbnail is never picked up
+        tmp_file = thumb_file.with_suffix(".tmp.png")
+        if image.save(str(tmp_file), "PNG"):
+            tmp_file.replace(thumb_file)
+    except OSError as e:
+        logging.debug(f"Could not cache cover {key}: {e}")
+    return key, image
+
+
+class _ArtSignals(QObject):
+    loaded = Signal(str, object, QImage)  # path, key or None, image
+
+
+class _ArtJob(QRunnable):
+    def __init__(self, signals: _ArtSignals, path: str, cache_dir: Path):
+        super().__init__()
+        self.signals = signals
+        self.path = path
+        self.cache_dir = cache_dir
+
+    def run(self):
+        key, image = load_thumbnail(self.path, self.cache_dir)
+        self.signals.loaded.emit(self.path, key, image)
+
+
+class AlbumArtCache(QObject):
+    """
+    Two-tier cover cache: a bounded LRU of decoded, view-sized pixmaps in memory,
+    backed by PNG thumbnails on disk keyed by the hash of the embedded image.
+    Which key each track has is remembered for the max_paths most recently shown tracks.
+    """
+    art_ready = Signal(str, QPixmap)  # path, cover (null pixmap if the track has none)
+
+    def __init__(self, parent=None, pool: Optional[QThreadPool] = None, max_items: int = 64,
+                 cache_dir: Path = CACHE_DIR, max_paths: int = 4096):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self.max_items = max_items
+        self.max_paths = max_paths
+        self.cache_dir = cache_dir
+        self._pixmaps = OrderedDict()  # key -> QPixmap, most recently used last
+        self._keys = OrderedDict()     # path -> key, None when the track has no cover, most recently used last
+        self._pending = set()
+        self._signals = _ArtSignals()
+        self._signals.loaded.connect(self._on_loaded)
+
+    def get(self, path: str) -> Optional[QPixmap]:
+        """
+        Return the cover of path if it is already in memory, a null pixmap if the track has no cover,
+        or None while it is loaded in the background (art_ready is emitted when done).
+        """
+        if path in self._keys:
+            key = self._keys[path]
+            self._keys.move_to_end(path)
+            if key is None:
+                return QPixmap()
+            pixmap = self._pixmaps.get(key)
+            if pixmap is not None:
+                self._pixmaps.move_to_end(key)
+                return pixmap
+        if path not in self._pending:
+            self._pending.add(path)
+            # Cover requests follow user actions, let them jump ahead of bulk tag reads
+            self.pool.start(_ArtJob(self._signals, path, self.cache_dir), 1)
+        return None
+
+    def _on_loaded(self, path, key, image):
+        self._pending.discard(path)
+        self._keys[path] = key
+        self._keys.move_to_end(path)
+        while len(self._keys) > self.max_paths:
+            self._keys.popitem(last=False)
+        if key is None:
+            self.art_ready.emit(path, QPixmap())
+            return
+        pixmap = self._pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap.fromImage(image)
+            self._pixmaps[key] = pixmap
+            while len(self._pixmaps) > self.max_items:
+                self._pixmaps.popitem(last=False)
+        else:
+            self._pixmaps.move_to_end(key)
+        self.art_ready.emit(path, pixmap)
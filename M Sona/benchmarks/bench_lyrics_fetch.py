@@ -0,0 +1,57 @@
+"""
+Benchmark of the lyrics fetch pipeline against a local stand-in server, no network access needed.
+
+    python benchmarks/bench_lyrics_fetch.py --songs 200 --latency 0.05 --workers 1,4,16 --rate 100
+
+Reports songs per second, retries and failures for each worker count.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path[:0] = [str(Path(__file__).resolve().parent), str(Path(__file__).resolve().parent.parent)]
+
+from fake_lyrics_server import FakeLyricsServer
+from lyrics_fetcher import HttpTransport, LyricsFetcher
+
+
+def songs(count: int):
+    for i in range(count):
+        title = f"Instrumental {i}" if i % 10 == 0 else f"Song {i}"
+        yield title, f"Artist {i % 50}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--songs", type=int, default=200)
+    parser.add_argument("--workers", default="1,4,16", help="comma separated worker counts")
+    parser.add_argument("--rate", type=float, default=100.0, help="client side requests per second")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds the server takes per request")
+    parser.add_argument("--failure-rate", type=float, default=0.05, help="share of requests answered with 503")
+    parser.add_argument("--server-limit", type=float, default=0.0, help="requests per second before the server sends 429")
+    args = parser.parse_args(argv)
+
+    for workers in [int(count) for count in args.workers.split(",")]:
+        server = FakeLyricsServer(args.latency, args.failure_rate, args.server_limit).start()
+        try:
+            fetcher = LyricsFetcher(HttpTransport(server.url), workers=workers, rate=args.rate, backoff=0.05)
+            start = time.perf_counter()
+            found = missing = failed = 0
+            for result in fetcher.fetch_many(songs(args.songs)):
+                if result.error:
+                    failed += 1
+                elif result.lyrics is None:
+                    missing += 1
+                else:
+                    found += 1
+            elapsed = time.perf_counter() - start
+        finally:
+            server.stop()
+        print(f"{workers:3d} workers: {args.songs / elapsed:8.1f} songs/s  "
+              f"{found} found, {missing} without lyrics, {failed} failed, "
+              f"{server.requests - args.songs} retries")
+
+
+if __name__ == "__main__":
+    main()
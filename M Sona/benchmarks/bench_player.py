@@ -0,0 +1,236 @@
+"""
+Headless benchmark of the M Sona hot paths.
+
+Runs MusicPlayer under Qt's offscreen platform with a pluggable stand-in for the vlc module
+(fake_vlc by default) on synthetic playlists, and reports latency and memory per playlist size:
+
+    python benchmarks/bench_player.py --sizes 1000,10000,100000,1000000 --save baseline.json
+    python benchmarks/bench_player.py --baseline baseline.json
+
+With --baseline, the run exits with status 1 when any median latency is more than --tolerance times
+the baseline one, so it can guard against regressions.
+"""
+import argparse
+import gc
+import importlib
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+APP_DIR = BENCH_DIR.parent
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+NOISE_FLOOR_MS = 0.02  # differences below this are timer noise, never a regression
+
+
+def install_backend(name: str):
+    """Import the module standing in for vlc, it has to be in place before the player modules import vlc"""
+    sys.path[:0] = [str(BENCH_DIR), str(APP_DIR)]
+    sys.modules["vlc"] = importlib.import_module(name)
+
+
+def synthetic_paths(count: int):
+    """Paths spread over artists and albums like a real collection, the files don't need to exist"""
+    return [
+        f"/bench/Artist {i % 500}/Album {i % 5000}/{i:07d} Track {i}.mp3"
+        for i in range(count)
+    ]
+
+
+def summarize(samples):
+    """Median and 95th percentile of samples in seconds, as milliseconds"""
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return {"median_ms": statistics.median(samples) * 1000, "p95_ms": p95 * 1000}
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+class PlayerBench:
+    def __init__(self, app, repeat: int, rng: random.Random):
+        import m_sona2
+        self.app = app
+        self.repeat = repeat
+        self.rng = rng
+        self.player = m_sona2.MusicPlayer()
+
+    def close(self):
+        player = self.player
+        # the synthetic files don't exist, there is no point letting the workers try to tag them
+        player.metadata_pool.pool.clear()
+        player.metadata_pool.wait_for_done()
+        player.peak_extractor.shutdown()
+        player.playback.stop()
+        self.app.processEvents()
+        player.deleteLater()
+        self.app.processEvents()
+        gc.collect()
+
+    def settle(self):
+        # deliver the queued tag, cover and position signals outside the timed sections
+        self.player.metadata_pool.pool.clear()
+        self.player.metadata_pool.wait_for_done()
+        self.app.processEvents()
+
+    def add_files(self, paths):
+        elapsed = timed(self.player.add_files, paths)
+        self.settle()
+        return {"median_ms": elapsed * 1000, "p95_ms": elapsed * 1000}
+
+    def next_song_shuffled(self):
+        player = self.player
+        player.shuffle_checkbox.setChecked(True)
+        self.settle()
+        samples = [timed(player.next_song) for _ in range(self.repeat)]
+        self.settle()
+        player.shuffle_checkbox.setChecked(False)
+        return summarize(samples)
+
+    def load_song(self):
+        player = self.player
+        samples = []
+        for _ in range(self.repeat):
+            row = self.rng.randrange(len(player.playlist))
+            player.current_index = row
+            samples.append(timed(player.load_song, player.playlist[row]))
+        self.settle()
+        return summarize(samples)
+
+    def update_seek(self):
+        player = self.player
+        length_ms = 180_000
+        step = length_ms // self.repeat
+        samples = [timed(player.update_seek, i * step, length_ms) for i in range(self.repeat)]
+        self.settle()
+        return summarize(samples)
+
+    def position_event(self):
+        """From a VLC TimeChanged callback to the seek bar and waveform, one display frame's worth"""
+        playback = self.player.playback
+        vlc_player = playback.player
+
+        def frame():
+            vlc_player.advance(16)
+            playback._flush_position()
+
+        samples = [timed(frame) for _ in range(self.repeat)]
+        self.settle()
+        return summarize(samples)
+
+
+def memory_of_add_files(app, paths, rng):
+    """Python memory kept and peak while adding paths to an empty player, in MB"""
+    bench = PlayerBench(app, 0, rng)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    bench.player.add_files(paths)
+    bench.settle()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    bench.close()
+    return {"retained_mb": (current - before) / 2 ** 20, "peak_mb": (peak - before) / 2 ** 20}
+
+
+def run(sizes, repeat, measure_memory, seed):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    import library
+    # keep the user's library out of it, every player starts from an empty index
+    workdir = tempfile.TemporaryDirectory(prefix="m_sona_bench_")
+    library.DB_PATH = Path(workdir.name) / "bench.db"
+
+    results = {}
+    try:
+        for size in sizes:
+            rng = random.Random(seed)
+            paths = synthetic_paths(size)
+            bench = PlayerBench(app, repeat, rng)
+            try:
+                metrics = {
+                    "add_files": bench.add_files(paths),
+                    "next_song_shuffle": bench.next_song_shuffled(),
+                    "load_song": bench.load_song(),
+                    "update_seek": bench.update_seek(),
+                    "position_event": bench.position_event(),
+                }
+            finally:
+                bench.close()
+            if measure_memory:
+                metrics["memory"] = memory_of_add_files(app, paths, rng)
+            results[str(size)] = metrics
+            print_size(size, metrics)
+    finally:
+        workdir.cleanup()
+    return results
+
+
+def print_size(size, metrics):
+    print(f"\n{size:,} tracks")
+    for name, values in metrics.items():
+        if name == "memory":
+            print(f"  {'add_files memory':<20} {values['retained_mb']:10.1f} MB kept  {values['peak_mb']:10.1f} MB peak")
+        else:
+            print(f"  {name:<20} {values['median_ms']:10.3f} ms median  {values['p95_ms']:10.3f} ms p95")
+
+
+def find_regressions(results, baseline, tolerance):
+    regressions = []
+    for size, metrics in results.items():
+        for name, values in metrics.items():
+            old = baseline.get(size, {}).get(name)
+            if old is None or "median_ms" not in values:
+                continue
+            new_ms, old_ms = values["median_ms"], old["median_ms"]
+            if new_ms > old_ms * tolerance and new_ms - old_ms > NOISE_FLOOR_MS:
+                regressions.append(f"{name} at {int(size):,} tracks: {old_ms:.3f} ms -> {new_ms:.3f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated playlist sizes")
+    parser.add_argument("--repeat", type=int, default=200, help="operations timed per measurement")
+    parser.add_argument("--vlc-backend", default="fake_vlc", help="module imported in place of vlc")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, help="compare against results saved with --save")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="slowdown factor over the baseline that counts as a regression")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    install_backend(args.vlc_backend)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    results = run(sizes, args.repeat, not args.no_memory, args.seed)
+
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = find_regressions(results, json.loads(args.baseline.read_text()), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""
+Local stand-in for a lyrics API, the endpoint lyrics_fetcher.HttpTransport talks to.
+Answers GET /lyrics?title=..&artist=.. after a configurable delay, and can be told to rate limit
+(429 with Retry-After) and to fail a share of requests with 503, so retries and backoff get exercised.
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeLyricsServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/lyrics":
+            self._reply(404, {})
+            return
+        query = parse_qs(url.query)
+        title = query.get("title", [""])[0]
+        artist = query.get("artist", [""])[0]
+        server = self.server
+        server.count_request()
+        time.sleep(server.latency)
+        if not server.allow():
+            self._reply(429, {"error": "rate limited"}, {"Retry-After": "1"})
+        elif server.rng_random() < server.failure_rate:
+            self._reply(503, {"error": "unavailable"})
+        elif title.lower().startswith("instrumental"):
+            self._reply(404, {"error": "not found"})
+        else:
+            self._reply(200, {"lyrics": f"{title} by {artist}\n" + "la la la\n" * 20})
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLyricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency: float = 0.05, failure_rate: float = 0.0,
+                 max_per_second: float = 0.0, seed: int = 1):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.max_per_second = max_per_second  # 0 disables rate limiting
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._window = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def rng_random(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def allow(self) -> bool:
+        """Sliding one second window, like the quota of a real API"""
+        if not self.max_per_second:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.max_per_second:
+                return False
+            self._window.append(now)
+            return True
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,159 @@
+"""
+Stand-in for the python-vlc module, so M Sona can be benchmarked without libvlc or a sound card.
+It implements the part of the API the player uses. Events are delivered synchronously on the
+calling thread, in the same shape VLC hands them to callbacks (event.u.new_time, event.u.new_length).
+"""
+import enum
+from types import SimpleNamespace
+
+
+class State(enum.IntEnum):
+    NothingSpecial = 0
+    Opening = 1
+    Buffering = 2
+    Playing = 3
+    Paused = 4
+    Stopped = 5
+    Ended = 6
+    Error = 7
+
+
+class EventType(enum.IntEnum):
+    MediaPlayerPlaying = 260
+    MediaPlayerPaused = 261
+    MediaPlayerStopped = 262
+    MediaPlayerEndReached = 265
+    MediaPlayerTimeChanged = 267
+    MediaPlayerLengthChanged = 273
+
+
+class MediaParseFlag(enum.IntEnum):
+    local = 0
+    network = 1
+
+
+DEFAULT_LENGTH_MS = 180_000
+
+
+class Media:
+    def __init__(self, mrl: str):
+        self.mrl = mrl
+        self.parsed = False
+
+    def get_mrl(self) -> str:
+        return self.mrl
+
+    def parse_with_options(self, flags, timeout):
+        self.parsed = True
+        return 0
+
+
+class EventManager:
+    def __init__(self):
+        self.callbacks = {}
+
+    def event_attach(self, event_type, callback, *args):
+        self.callbacks.setdefault(event_type, []).append((callback, args))
+
+    def event_detach(self, event_type):
+        self.callbacks.pop(event_type, None)
+
+    def send(self, event_type, **fields):
+        event = SimpleNamespace(type=event_type, u=SimpleNamespace(**fields))
+        for callback, args in self.callbacks.get(event_type, ()):
+            callback(event, *args)
+
+
+class MediaPlayer:
+    def __init__(self, length_ms: int = DEFAULT_LENGTH_MS):
+        self.media = None
+        self.state = State.NothingSpecial
+        self.time_ms = 0
+        self.length_ms = length_ms
+        self.volume = 100
+        self._events = EventManager()
+
+    def event_manager(self) -> EventManager:
+        return self._events
+
+    def set_media(self, media):
+        self.media = media
+
+    def get_media(self):
+        return self.media
+
+    def play(self) -> int:
+        if self.media is None:
+            return -1
+        if self.state not in (State.Playing, State.Paused):
+            self.time_ms = 0
+            self._events.send(EventType.MediaPlayerLengthChanged, new_length=self.length_ms)
+        self.state = State.Playing
+        self._events.send(EventType.MediaPlayerPlaying)
+        return 0
+
+    def pause(self):
+        if self.state == State.Playing:
+            self.state = State.Paused
+            self._events.send(EventType.MediaPlayerPaused)
+
+    def stop(self):
+        if self.state in (State.Playing, State.Paused):
+            self.state = State.Stopped
+            self._events.send(EventType.MediaPlayerStopped)
+
+    def get_state(self) -> State:
+        return self.state
+
+    def is_playing(self) -> int:
+        return int(self.state == State.Playing)
+
+    def get_time(self) -> int:
+        return self.time_ms
+
+    def set_time(self, time_ms: int):
+        self.time_ms = time_ms
+
+    def get_length(self) -> int:
+        return self.length_ms
+
+    def get_position(self) -> float:
+        return self.time_ms / self.length_ms if self.length_ms else 0.0
+
+    def set_position(self, position: float):
+        self.time_ms = int(position * self.length_ms)
+
+    def audio_set_volume(self, volume: int) -> int:
+        self.volume = volume
+        return 0
+
+    def audio_get_volume(self) -> int:
+        return self.volume
+
+    # Driving the fake, what libvlc would do on its own while a track plays
+
+    def advance(self, ms: int):
+        """Move playback forward by ms and report it like VLC's TimeChanged event"""
+        self.time_ms = min(self.length_ms, self.time_ms + ms)
+        self._events.send(EventType.MediaPlayerTimeChanged, new_time=self.time_ms)
+
+    def finish(self):
+        self.time_ms = self.length_ms
+        self.state = State.Ended
+        self._events.send(EventType.MediaPlayerEndReached)
+
+
+class Instance:
+    def __init__(self, *args):
+        self.players = []
+
+    def media_player_new(self) -> MediaPlayer:
+        player = MediaPlayer()
+        self.players.append(player)
+        return player
+
+    def media_new(self, mrl: str) -> Media:
+        return Media(mrl)
+
+    def release(self):
+        self.players = []
@@ -0,0 +1,208 @@
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from metadata import TrackInfo, read_track_info
+
+AUDIO_EXTENSIONS = (".mp3", ".wav", ".ogg", ".flac", ".m4a")
+DB_PATH = Path(__file__).parent / "m_sona.db"
+LOAD_BATCH = 5000  # tracks per batch sent to the GUI when the library is loaded
+
+
+@dataclass
+class ScanResult:
+    """What changed in the library during a scan"""
+    changed: List[TrackInfo] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+
+
+class MusicLibrary:
+    """
+    On-disk index of every track the user added, keyed by path.
+    The file mtime and size are stored next to the tags so rescans only reread files that changed.
+    """
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = db_path or DB_PATH
+        self.conn = sqlite3.connect(self.db_path)
+        self.create_db()
+
+    def create_db(self):
+        """Creates the library tables if they don't already exist"""
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS library (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                artist TEXT NOT NULL DEFAULT '',
+                album TEXT NOT NULL DEFAULT '',
+                duration_ms INTEGER NOT NULL DEFAULT 0,
+                album_artist TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS library_roots (
+                path TEXT PRIMARY KEY
+            );
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(library)")}
+        if "album_artist" not in columns:
+            # indexed before album artists were kept: add the column and reread every file on the next scan
+            self.conn.execute("ALTER TABLE library ADD COLUMN album_artist TEXT NOT NULL DEFAULT ''")
+            self.conn.execute("UPDATE library SET mtime = -1")
+        self.conn.commit()
+
+    def close_connection(self):
+        if self.conn:
+            self.conn.close()
+
+    def roots(self) -> List[str]:
+        """Folders that were added to the library"""
+        return [row[0] for row in self.conn.execute("SELECT path FROM library_roots ORDER BY path")]
+
+    def load_all(self, batch_size: int = LOAD_BATCH) -> Iterator[List[TrackInfo]]:
+        """Every indexed track in batches of batch_size, without touching the audio files"""
+        rows = self.conn.execute(
+            "SELECT path, title, artist, album, duration_ms, album_artist FROM library ORDER BY path"
+        )
+        while True:
+            batch = rows.fetchmany(batch_size)
+            if not batch:
+                break
+            yield [TrackInfo(*row) for row in batch]
+
+    def tracks_under(self, root: str) -> List[TrackInfo]:
+        low, high = self._prefix_range(root)
+        rows = self.conn.execute(
+            "SELECT path, title, artist, album, duration_ms, album_artist FROM library"
+            " WHERE path >= ? AND path < ? ORDER BY path",
+            (low, high),
+        )
+        return [TrackInfo(*row) for row in rows]
+
+    def scan(self, root: str, max_workers: Optional[int] = None) -> ScanResult:
+        """
+        Index every audio file under root.
+        Files whose mtime and size match the index are skipped, only new or modified files have their tags read.
+        """
+        root = os.path.abspath(root)
+        low, high = self._prefix_range(root)
+        known = {
+            path: (mtime, size)
+            for path, mtime, size in self.conn.execute(
+                "SELECT path, mtime, size FROM library WHERE path >= ? AND path < ?", (low, high)
+            )
+        }
+
+        result = ScanResult()
+        to_read = []
+        for path, stat in self._walk(root):
+            key = (stat.st_mtime_ns, stat.st_size)
+            if known.pop(path, None) == key:
+                result.unchanged += 1
+            else:
+                to_read.append((path, key))
+
+        if to_read:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                result.changed = list(executor.map(read_track_info, [path for path, _ in to_read]))
+        result.removed = list(known)
+
+        with self.conn:
+            self.conn.execute("INSERT OR IGNORE INTO library_roots (path) VALUES (?)", (root,))
+            self.conn.executemany(
+                """
+                    INSERT OR REPLACE INTO library (path, mtime, size, title, artist, album, duration_ms, album_artist)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (info.path, mtime, size, info.title, info.artist, info.album, info.duration_ms, info.album_artist)
+                    for info, (_, (mtime, size)) in zip(result.changed, to_read)
+                ],
+            )
+            self.conn.executemany("DELETE FROM library WHERE path = ?", [(path,) for path in result.removed])
+
+        logging.debug(
+            f"Scanned {root}: {len(result.changed)} changed, {len(result.removed)} removed, {result.unchanged} unchanged"
+        )
+        return result
+
+    @staticmethod
+    def _prefix_range(root: str):
+        prefix = os.path.join(os.path.abspath(root), "")
+        return prefix, prefix + "\U0010ffff"
+
+    @staticmethod
+    def _walk(root: str):
+        """Yield (path, stat) for every audio file under root"""
+        stack = [root]
+        while stack:
+            folder = stack.pop()
+            try:
+                entries = os.scandir(folder)
+            except OSError as e:
+                logging.debug(f"Skipping {folder}: {e}")
+                continue
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                            yield entry.path, entry.stat()
+                    except OSError:
+                        continue
+
+
+class _ScanSignals(QObject):
+    loaded = Signal(object)         # list of TrackInfo
+    finished = Signal(str, object)  # root, ScanResult
+
+
+class _ScanJob(QRunnable):
+    def __init__(self, signals: _ScanSignals, db_path: Path, roots: Optional[List[str]]):
+        super().__init__()
+        self.signals = signals
+        self.db_path = db_path
+        self.roots = roots
+
+    def run(self):
+        # sqlite connections can't cross threads, the job opens its own
+        library = MusicLibrary(self.db_path)
+        try:
+            roots = self.roots
+            if roots is None:
+                # startup: hand over the indexed tracks first, then rescan every folder
+                for tracks in library.load_all():
+                    self.signals.loaded.emit(tracks)
+                roots = library.roots()
+            for root in roots:
+                self.signals.finished.emit(root, library.scan(root))
+        finally:
+            library.close_connection()
+
+
+class LibraryScanner(QObject):
+    """Loads the library and runs library scans off the GUI thread"""
+    tracks_loaded = Signal(object)
+    scan_finished = Signal(str, object)
+
+    def __init__(self, parent=None, db_path: Optional[Path] = None):
+        super().__init__(parent)
+        self.db_path = db_path or DB_PATH
+        self._signals = _ScanSignals()
+        self._signals.loaded.connect(self.tracks_loaded)
+        self._signals.finished.connect(self.scan_finished)
+
+    def load(self):
+        """Emit tracks_loaded for every batch of indexed tracks, then rescan the library's folders"""
+        QThreadPool.globalInstance().start(_ScanJob(self._signals, self.db_path, None))
+
+    def scan(self, roots: List[str]):
+        QThreadPool.globalInstance().start(_ScanJob(self._signals, self.db_path, list(roots)))
@@ -0,0 +1,105 @@
+import logging
+import re
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_TIMESTAMP = re.compile(r"\[(\d+):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+_WORD_TIMESTAMP = re.compile(r"<\d+:\d{1,2}(?:[.:]\d{1,3})?>")
+_OFFSET = re.compile(r"\[offset:\s*([+-]?\d+)\s*\]", re.IGNORECASE)
+
+
+class SyncedLyrics:
+    """
+    Time-synced lyrics: line start times in ms (sorted) next to the line texts,
+    so the line playing at any position is found with a binary search.
+    """
+
+    def __init__(self, times: Optional[array] = None, lines: Optional[List[str]] = None):
+        self.times = times if times is not None else array("i")
+        self.lines = lines if lines is not None else []
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def line_at(self, time_ms: int) -> int:
+        """Index of the line playing at time_ms, -1 before the first line"""
+        return bisect_right(self.times, time_ms) - 1
+
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def to_bytes(self) -> bytes:
+        return self.times.tobytes()
+
+    @classmethod
+    def from_parts(cls, times: bytes, text: str) -> "SyncedLyrics":
+        """Rebuild lyrics stored as to_bytes() and text()"""
+        offsets = array("i")
+        offsets.frombytes(times)
+        return cls(offsets, text.split("\n") if offsets else [])
+
+
+def _to_ms(minutes: str, seconds: str, fraction: Optional[str]) -> int:
+    ms = (int(minutes) * 60 + int(seconds)) * 1000
+    if fraction:
+        # ".5" is tenths, ".50" hundredths, ".500" milliseconds
+        ms += int(fraction.ljust(3, "0"))
+    return ms
+
+
+def parse_lrc(text: str) -> Optional[SyncedLyrics]:
+    """
+    Parse LRC lyrics, None when text has no timestamped lines.
+    Lines with several timestamps (repeated choruses) appear once per timestamp,
+    word timestamps of enhanced LRC are dropped and the [offset:] tag is applied.
+    """
+    offset = 0
+    match = _OFFSET.search(text)
+    if match:
+        # a positive offset shows the lyrics sooner
+        offset = int(match.group(1))
+
+    timed = []
+    for raw_line in text.splitlines():
+        position = 0
+        stamps = []
+        while True:
+            match = _TIMESTAMP.match(raw_line, position)
+            if not match:
+                break
+            stamps.append(_to_ms(*match.groups()))
+            position = match.end()
+        if not stamps:
+            continue
+        line = _WORD_TIMESTAMP.sub("", raw_line[position:]).strip()
+        timed.extend((max(0, stamp - offset), line) for stamp in stamps)
+
+    if not timed:
+        return None
+    timed.sort(key=lambda item: item[0])
+    return SyncedLyrics(array("i", (time_ms for time_ms, _ in timed)), [line for _, line in timed])
+
+
+def find_lrc(audio_path: str) -> Optional[Path]:
+    """The .lrc file stored next to an audio file, as most players and taggers save them"""
+    path = Path(audio_path)
+    for suffix in (".lrc", ".LRC"):
+        candidate = path.with_suffix(suffix)
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def load_lrc_for(audio_path: str) -> Optional[SyncedLyrics]:
+    lrc_path = find_lrc(audio_path)
+    if lrc_path is None:
+        return None
+    try:
+        return parse_lrc(lrc_path.read_text(encoding="utf-8-sig", errors="replace"))
+    except OSError as e:
+        logger.debug(f"Could not read {lrc_path}: {e}")
+        return None
@@ -1,61 +1,532 @@
-import lyricsgenius
 from pathlib import Path
+import functools
 import logging
-import sys
+import queue
+import re
 import sqlite3
-from typing import Any, Optional
-logging.basicConfig(level=logging.DEBUG)
- 
+import threading
+import time
+import unicodedata
+import weakref
+import zlib
+from collections import Counter
+from concurrent.futures import Future
+from dataclasses import dataclass
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from lrc import SyncedLyrics
+
+if TYPE_CHECKING:
+    from lyrics_fetcher import FetchResult
+
+# Importing this module has no side effects: nothing is configured or checked until it is used,
+# log output only shows up if the application configures logging.
+logger = logging.getLogger(__name__)
 
 ACCESS_TOKEN = Path(__file__).parent / "secrets" / ".env"
 
-if not ACCESS_TOKEN.exists():
-    logging.debug("File not found")
-    sys.exit()
+BULK_CHUNK_SIZE = 5000  # rows written per transaction by bulk_insert_songs
+LISTING_BATCH_SIZE = 500  # rows fetched per query by the iter_* listings
+SQL_VARIABLE_LIMIT = 900  # stay below SQLITE_MAX_VARIABLE_NUMBER of older SQLite builds
+SCHEMA_VERSION = 4  # PRAGMA user_version once create_db ran
+ZDICT_SIZE = 32 * 1024  # zlib can't use more of a preset dictionary than its 32 KB window
+COMPRESSION_LEVEL = 9
+# Set on every connection. WAL lets readers run while the writer commits, NORMAL sync is still
+# crash-safe in WAL mode, and reads are served from a larger page cache and memory-mapped I/O.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -16000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 268435456",
+)
+UPSERT_SONG = """
+    INSERT INTO songs (title, normalized_title, artist_id, lyrics_z, dict_id) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (artist_id, normalized_title) DO UPDATE SET
+        title = excluded.title,
+        dict_id = CASE WHEN excluded.lyrics_z IS NULL THEN songs.dict_id ELSE excluded.dict_id END,
+        lyrics_z = COALESCE(excluded.lyrics_z, songs.lyrics_z)
+"""
+_SEARCH_WORD = re.compile(r"\w+")
+
+
+def normalize_title(title: str) -> str:
+    """Key that treats titles differing only in case, width or spacing as the same song"""
+    return " ".join(unicodedata.normalize("NFKC", title).casefold().split())
+
+
+def fts_query(text: str, phrase: bool = False) -> str:
+    """
+    Turn what the user typed into an FTS5 query.
+    Words are quoted so punctuation can't break the query syntax, the last one matches as a prefix
+    so results show up while typing. With phrase the words have to appear next to each other, in order.
+    """
+    words = _SEARCH_WORD.findall(text)
+    if not words:
+        return ""
+    if phrase:
+        return '"' + " ".join(words) + '"'
+    return " ".join(f'"{word}"' for word in words) + "*"
+
+
+def compress_lyrics(text: Optional[str], zdict: Optional[bytes] = None) -> Optional[bytes]:
+    if text is None:
+        return None
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=zdict) if zdict else zlib.compressobj(COMPRESSION_LEVEL)
+    return compressor.compress(text.encode()) + compressor.flush()
+
+
+def decompress_lyrics(data: Optional[bytes], zdict: Optional[bytes] = None) -> Optional[str]:
+    if data is None:
+        return None
+    decompressor = zlib.decompressobj(zdict=zdict) if zdict else zlib.decompressobj()
+    return (decompressor.decompress(data) + decompressor.flush()).decode()
+
+
+def build_dictionary(samples: Iterable[str], size: int = ZDICT_SIZE) -> bytes:
+    """
+    Preset zlib dictionary from sample lyrics: the lines that come back across songs
+    ("[Chorus]", ad-libs, common phrases). Short texts like lyrics compress much better when
+    those don't have to be spelled out again in every row.
+    """
+    counts = Counter(line.strip() for text in samples for line in text.splitlines() if line.strip())
+    picked = []
+    total = 0
+    for line, count in counts.most_common():
+        if count < 2:
+            break
+        data = (line + "\n").encode()
+        if total + len(data) > size:
+            continue
+        picked.append(data)
+        total += len(data)
+    # zlib reaches the end of the dictionary with the shortest distances, the most common lines go there
+    return b"".join(reversed(picked))
+
+
+@dataclass
+class IngestReport:
+    """What a bulk insert wrote and how fast"""
+    rows: int = 0
+    new_artists: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class _Connection(sqlite3.Connection):
+    """Plain connection that can be weakly referenced"""
+
+
+def _on_writer(method):
+    """Run a LyricsDb method on its writer thread and wait for the result"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        return self._write(method, self, *args, **kwargs)
+    return wrapper
 
 
 class LyricsDb:
+    """
+    Songs and lyrics in SQLite, safe to share between threads.
+    Each thread reads through its own connection, so lookups from the player never wait for a
+    background import. All writes are queued to a single writer thread with its own connection.
+    """
     
-    def __init__(self):
+    def __init__(self, db_path: Optional[Path] = None):
         self.base_path = Path(__file__).parent
-        self.conn = sqlite3.connect(self.base_path / "m_sona.db")
-        self.conn_cursor = self.conn.cursor()
+        self.db_path = db_path or self.base_path / "m_sona.db"
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()  # connections of threads that are still alive
+        self._connections_lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._zdicts: Dict[int, bytes] = {}
+        self._active_dict: Optional[int] = None
+        self._dicts_loaded = False
+        self._dicts_lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the calling thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # connections never cross threads, check_same_thread is only off so close_connection can close them all
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False, factory=_Connection)
+            for pragma in CONNECTION_PRAGMAS:
+                conn.execute(pragma)
+            # the full-text index reads lyrics through this, see _compress_storage
+            conn.create_function("lyrics_text", 2, self._decompress, deterministic=True)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.add(conn)
+        return conn
+
+    @property
+    def conn_cursor(self) -> sqlite3.Cursor:
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self.conn.cursor()
+        return cursor
 
+    def _write(self, func, *args, **kwargs):
+        if threading.current_thread() is self._writer:
+            return func(*args, **kwargs)
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="LyricsDb writer", daemon=True)
+                self._writer.start()
+        future = Future()
+        self._writes.put((future, func, args, kwargs))
+        return future.result()
+
+    def _write_loop(self):
+        while True:
+            job = self._writes.get()
+            if job is None:
+                break
+            future, func, args, kwargs = job
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    @_on_writer
     def create_db(self):
-        """Creates db if doesn't already exist"""
-        self.conn_cursor.execute("""
-            CREATE TABLE IF NOT EXISTS artists (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL)
+        """Creates db if doesn't already exist, or brings an older one up to SCHEMA_VERSION"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in enumerate(self._migrations()[version:], version + 1):
+            # each step and its version bump commit together, a failed step leaves the previous version intact
+            self.conn.execute("BEGIN")
+            try:
+                migration()
+                self.conn.execute(f"PRAGMA user_version = {target}")
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+            logger.debug(f"Lyrics schema migrated to version {target}")
+
+    def _migrations(self):
+        """Schema steps in order, step n brings the database from user_version n - 1 to n"""
+        return [self._create_tables, self._add_song_keys, self._compress_storage, self._add_synced_lyrics]
+
+    def _create_tables(self):
+        """
+        Songs, artists and a full-text index over song titles, artist names and lyrics.
+        Triggers keep the index in step with the songs and artists tables, its rowid is the song id.
+        """
+        index_exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'songs_fts'"
+        ).fetchone()
+        for statement in (
+            """
+                CREATE TABLE IF NOT EXISTS artists (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT UNIQUE NOT NULL)
+            """,
+            """
+                CREATE TABLE IF NOT EXISTS songs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    artist_id INTEGER,
+                    lyrics TEXT,
+                    FOREIGN KEY (artist_id) REFERENCES artists(id))
+            """,
+            """
+                CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+                    title, artist, lyrics,
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3')
+            """,
+            """
+                CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON songs BEGIN
+                    INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                    VALUES (new.id, new.title, (SELECT name FROM artists WHERE id = new.artist_id), new.lyrics);
+                END
+            """,
+            """
+                CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON songs BEGIN
+                    DELETE FROM songs_fts WHERE rowid = old.id;
+                END
+            """,
+            "DROP TRIGGER IF EXISTS songs_fts_update",
+            """
+                CREATE TRIGGER songs_fts_update AFTER UPDATE OF title, artist_id, lyrics ON songs BEGIN
+                    DELETE FROM songs_fts WHERE rowid = old.id;
+                    INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                    VALUES (new.id, new.title, (SELECT name FROM artists WHERE id = new.artist_id), new.lyrics);
+                END
+            """,
+            """
+                CREATE TRIGGER IF NOT EXISTS artists_fts_rename AFTER UPDATE OF name ON artists BEGIN
+                    UPDATE songs_fts SET artist = new.name
+                    WHERE rowid IN (SELECT id FROM songs WHERE artist_id = new.id);
+                END
+            """,
+        ):
+            self.conn.execute(statement)
+        if not index_exists:
+            # songs stored before the index existed
+            self.conn.execute("""
+                INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                SELECT songs.id, songs.title, artists.name, songs.lyrics
+                FROM songs LEFT JOIN artists ON songs.artist_id = artists.id
             """)
-        self.conn_cursor.execute("""
-            CREATE TABLE IF NOT EXISTS songs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                artist_id INTEGER,
-                lyrics TEXT,
-                FOREIGN KEY (artist_id) REFERENCES artists(id)
-                                 )    
+
+    def _add_song_keys(self):
+        """
+        One row per (artist, normalized title), so storing a song again updates it instead of adding a copy.
+        Older databases may hold copies already, only the most recent one of each is kept.
+        """
+        self.conn.create_function("normalize_title", 1, normalize_title, deterministic=True)
+        self.conn.execute("ALTER TABLE songs ADD COLUMN normalized_title TEXT NOT NULL DEFAULT ''")
+        self.conn.execute("UPDATE songs SET normalized_title = normalize_title(title)")
+        self.conn.execute("""
+            DELETE FROM songs WHERE id NOT IN (
+                SELECT MAX(id) FROM songs GROUP BY artist_id, normalized_title
+            )
         """)
+        self.conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS songs_artist_title ON songs (artist_id, normalized_title)"
+        )
+        # title lookups get the song and artist ids from the index alone
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS songs_title ON songs (normalized_title, artist_id)"
+        )
     
+    def _compress_storage(self):
+        """
+        Lyrics become zlib blobs (lyrics_z), optionally compressed against a shared dictionary (dict_id).
+        The full-text index no longer keeps its own copy of every lyric: it is an external content index
+        over the songs_text view, which decompresses a lyric only when a snippet needs it.
+        """
+        for trigger in ("songs_fts_insert", "songs_fts_delete", "songs_fts_update", "artists_fts_rename"):
+            self.conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        self.conn.execute("DROP TABLE IF EXISTS songs_fts")
+        self.conn.create_function("compress_lyrics", 1, compress_lyrics, deterministic=True)
+        for statement in (
+            """
+                CREATE TABLE IF NOT EXISTS lyrics_dicts (
+                    id INTEGER PRIMARY KEY,
+                    data BLOB NOT NULL)
+            """,
+            """
+                CREATE TABLE songs_compressed (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    title TEXT NOT NULL,
+                    normalized_title TEXT NOT NULL DEFAULT '',
+                    artist_id INTEGER,
+                    lyrics_z BLOB,
+                    dict_id INTEGER,
+                    FOREIGN KEY (artist_id) REFERENCES artists(id),
+                    FOREIGN KEY (dict_id) REFERENCES lyrics_dicts(id))
+            """,
+            """
+                INSERT INTO songs_compressed (id, title, normalized_title, artist_id, lyrics_z)
+                SELECT id, title, normalized_title, artist_id, compress_lyrics(lyrics) FROM songs
+            """,
+            "DROP TABLE songs",
+            "ALTER TABLE songs_compressed RENAME TO songs",
+            "CREATE UNIQUE INDEX songs_artist_title ON songs (artist_id, normalized_title)",
+            "CREATE INDEX songs_title ON songs (normalized_title, artist_id)",
+            """
+                CREATE VIEW songs_text AS
+                SELECT songs.id AS id, songs.title AS title, artists.name AS artist,
+                       lyrics_text(songs.lyrics_z, songs.dict_id) AS lyrics
+                FROM songs LEFT JOIN artists ON songs.artist_id = artists.id
+            """,
+            """
+                CREATE VIRTUAL TABLE songs_fts USING fts5(
+                    title, artist, lyrics,
+                    content = 'songs_text', content_rowid = 'id',
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3')
+            """,
+            # an external content index has to be told the old text to remove it
+            """
+                CREATE TRIGGER songs_fts_insert AFTER INSERT ON songs BEGIN
+                    INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                    VALUES (new.id, new.title, (SELECT name FROM artists WHERE id = new.artist_id),
+                            lyrics_text(new.lyrics_z, new.dict_id));
+                END
+            """,
+            """
+                CREATE TRIGGER songs_fts_delete AFTER DELETE ON songs BEGIN
+                    INSERT INTO songs_fts (songs_fts, rowid, title, artist, lyrics)
+                    VALUES ('delete', old.id, old.title, (SELECT name FROM artists WHERE id = old.artist_id),
+                            lyrics_text(old.lyrics_z, old.dict_id));
+                END
+            """,
+            # recompressing a lyric with another dictionary leaves the index alone
+            """
+                CREATE TRIGGER songs_fts_update AFTER UPDATE OF title, artist_id, lyrics_z ON songs
+                WHEN old.title IS NOT new.title OR old.artist_id IS NOT new.artist_id
+                     OR lyrics_text(old.lyrics_z, old.dict_id) IS NOT lyrics_text(new.lyrics_z, new.dict_id)
+                BEGIN
+                    INSERT INTO songs_fts (songs_fts, rowid, title, artist, lyrics)
+                    VALUES ('delete', old.id, old.title, (SELECT name FROM artists WHERE id = old.artist_id),
+                            lyrics_text(old.lyrics_z, old.dict_id));
+                    INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                    VALUES (new.id, new.title, (SELECT name FROM artists WHERE id = new.artist_id),
+                            lyrics_text(new.lyrics_z, new.dict_id));
+                END
+            """,
+            """
+                CREATE TRIGGER artists_fts_rename AFTER UPDATE OF name ON artists BEGIN
+                    INSERT INTO songs_fts (songs_fts, rowid, title, artist, lyrics)
+                    SELECT 'delete', id, title, old.name, lyrics_text(lyrics_z, dict_id)
+                    FROM songs WHERE artist_id = old.id;
+                    INSERT INTO songs_fts (rowid, title, artist, lyrics)
+                    SELECT id, title, new.name, lyrics_text(lyrics_z, dict_id)
+                    FROM songs WHERE artist_id = new.id;
+                END
+            """,
+            "INSERT INTO songs_fts (songs_fts) VALUES ('rebuild')",
+        ):
+            self.conn.execute(statement)
+
+    def _add_synced_lyrics(self):
+        """Time-synced (LRC) lyrics: line start times as a packed int array, line texts compressed"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS synced_lyrics (
+                song_id INTEGER PRIMARY KEY,
+                times BLOB NOT NULL,
+                lines_z BLOB NOT NULL,
+                dict_id INTEGER,
+                FOREIGN KEY (song_id) REFERENCES songs(id))
+        """)
+        self.conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS synced_lyrics_delete AFTER DELETE ON songs BEGIN
+                DELETE FROM synced_lyrics WHERE song_id = old.id;
+            END
+        """)
+
+    @_on_writer
+    def store_synced_lyrics(self, song_id: int, lyrics: SyncedLyrics):
+        """Store or replace the synced lyrics of a song"""
+        data, dict_id = self._compress(lyrics.text())
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO synced_lyrics (song_id, times, lines_z, dict_id) VALUES (?, ?, ?, ?)",
+                (song_id, lyrics.to_bytes(), data, dict_id),
+            )
+
+    def get_synced_lyrics(self, song_id: int) -> Optional[SyncedLyrics]:
+        row = self.conn.execute(
+            "SELECT times, lines_z, dict_id FROM synced_lyrics WHERE song_id = ?", (song_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return SyncedLyrics.from_parts(row[0], self._decompress(row[1], row[2]))
+
+    def _load_dicts(self):
+        with self._dicts_lock:
+            if self._dicts_loaded:
+                return
+            for dict_id, data in self.conn.execute("SELECT id, data FROM lyrics_dicts ORDER BY id"):
+                self._zdicts[dict_id] = data
+                self._active_dict = dict_id
+            self._dicts_loaded = True
+
+    def _zdict(self, dict_id: Optional[int]) -> Optional[bytes]:
+        if dict_id is None:
+            return None
+        if dict_id not in self._zdicts:
+            self._dicts_loaded = False
+            self._load_dicts()
+        return self._zdicts[dict_id]
+
+    def _compress(self, lyrics: Optional[str]) -> Tuple[Optional[bytes], Optional[int]]:
+        """(blob, dictionary id) to store for lyrics, compressed with the newest dictionary"""
+        self._load_dicts()
+        dict_id = self._active_dict if lyrics is not None else None
+        return compress_lyrics(lyrics, self._zdict(dict_id)), dict_id
+
+    def _decompress(self, data: Optional[bytes], dict_id: Optional[int]) -> Optional[str]:
+        return decompress_lyrics(data, self._zdict(dict_id))
+
+    @_on_writer
+    def train_dictionary(self, sample_size: int = 2000, recompress: bool = True) -> Optional[int]:
+        """
+        Build a shared compression dictionary from a sample of the stored lyrics and use it for new writes.
+        With recompress, songs stored earlier are rewritten with it too. Returns the dictionary id,
+        None when the lyrics have too little in common to build one.
+        """
+        rows = self.conn.execute(
+            "SELECT lyrics_z, dict_id FROM songs WHERE lyrics_z IS NOT NULL ORDER BY random() LIMIT ?", (sample_size,)
+        )
+        zdict = build_dictionary(self._decompress(data, dict_id) for data, dict_id in rows)
+        if not zdict:
+            return None
+        with self.conn:
+            dict_id = self.conn.execute("INSERT INTO lyrics_dicts (data) VALUES (?)", (zdict,)).lastrowid
+        with self._dicts_lock:
+            self._zdicts[dict_id] = zdict
+            self._active_dict = dict_id
+        if recompress:
+            last_id = 0
+            while True:
+                rows = self.conn.execute(
+                    """
+                        SELECT id, lyrics_z, dict_id FROM songs
+                        WHERE id > ? AND lyrics_z IS NOT NULL ORDER BY id LIMIT ?
+                    """, (last_id, BULK_CHUNK_SIZE)
+                ).fetchall()
+                if not rows:
+                    break
+                with self.conn:
+                    self.conn.executemany(
+                        "UPDATE songs SET lyrics_z = ?, dict_id = ? WHERE id = ?",
+                        [(compress_lyrics(self._decompress(data, old_dict), zdict), dict_id, song_id)
+                         for song_id, data, old_dict in rows],
+                    )
+                last_id = rows[-1][0]
+        logger.debug(f"Trained lyrics dictionary {dict_id} ({len(zdict)} bytes)")
+        return dict_id
+
+    @_on_writer
+    def vacuum(self):
+        """Give the space freed by deletes and recompression back to the file system"""
+        self.conn.execute("VACUUM")
+
+    def get_lyrics(self, song_id: int) -> Optional[str]:
+        """Lyrics of one song, decompressed on demand"""
+        row = self.conn.execute("SELECT lyrics_z, dict_id FROM songs WHERE id = ?", (song_id,)).fetchone()
+        return self._decompress(*row) if row else None
+
     def close_connection(self):
-        """Close connection to db"""
-        if self.conn:
-            self.conn.close()
-            logging.debug("Closing connection to database")
+        """Stop the writer and close the connections of every thread"""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._writes.put(None)
+            writer.join()
+        with self._connections_lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        logger.debug("Closing connection to database")
 
+    @_on_writer
     def commit_data(self):
         """Commits data to database"""
         if self.conn:
             self.conn.commit()
-            logging.debug("Commiting data to database")
+            logger.debug("Commiting data to database")
     
+    @_on_writer
     def insert_artist(self, name:str) -> int:
         """Insert artis into the databse, return artist ID"""
         try:
             self.conn_cursor.execute(
                 """
-                    INSERT OR IGNORE artists (name) VALUES (?)
+                    INSERT OR IGNORE INTO artists (name) VALUES (?)
                 """,
                 (name,)
             )
@@ -69,23 +540,91 @@ class LyricsDb:
                 (name,)
             )
             artist_id = self.conn_cursor.fetchone()[0]
-            logging.debug(f"Artist {name} has ID {artist_id}")
+            logger.debug(f"Artist {name} has ID {artist_id}")
             return artist_id
         except Exception as e:
-            logging.error(f"Error inserting artist {name}: {e}")
+            logger.error(f"Error inserting artist {name}: {e}")
             return -1
         
+    @_on_writer
     def insert_song(self, title: str, artist_id: int, lyrics: str):
-        """Insert song into the database"""
+        """Insert song into the database, or update its lyrics if the artist already has a song with that title"""
         try:
-            self.conn_cursor.execute(
-                """
-                    INSERT INTO songs (title, artist_id, lyrics) VALUES (?, ?, ?)
-                """, (title, artist_id, lyrics),
-            )
+            self.conn_cursor.execute(UPSERT_SONG, (title, normalize_title(title), artist_id, *self._compress(lyrics)))
 
         except Exception as e:
-            logging.error(f"Error inserting song {title}: {e}")
+            logger.error(f"Error inserting song {title}: {e}")
+
+    @_on_writer
+    def resolve_artist_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Map artist names to ids, inserting the ones not in the database yet.
+        Works on the whole batch with a handful of statements instead of two per artist, and doesn't commit.
+        """
+        names = list(dict.fromkeys(names))
+        ids = self._artist_ids(names)
+        missing = [name for name in names if name not in ids]
+        if missing:
+            self.conn.executemany("INSERT OR IGNORE INTO artists (name) VALUES (?)", [(name,) for name in missing])
+            ids.update(self._artist_ids(missing))
+        return ids
+
+    def _artist_ids(self, names: list) -> Dict[str, int]:
+        ids = {}
+        for start in range(0, len(names), SQL_VARIABLE_LIMIT):
+            chunk = names[start:start + SQL_VARIABLE_LIMIT]
+            placeholders = ",".join("?" * len(chunk))
+            ids.update(
+                (name, artist_id) for artist_id, name in self.conn.execute(
+                    f"SELECT id, name FROM artists WHERE name IN ({placeholders})", chunk
+                )
+            )
+        return ids
+
+    def bulk_insert_songs(self, records: Iterable[Tuple[str, str, str]],
+                          chunk_size: int = BULK_CHUNK_SIZE) -> IngestReport:
+        """
+        Insert (artist, title, lyrics) records, songs already stored get the new lyrics.
+        Records are written chunk_size at a time, each chunk in a single transaction,
+        so a large import costs one commit per chunk instead of one per song.
+        Chunks are separate writer jobs, other writes are not held up until the whole import is done.
+        """
+        report = IngestReport()
+        known_artists: Dict[str, int] = {}
+        start = time.perf_counter()
+        records = iter(records)
+        while True:
+            # compressing happens here, on the caller's thread, so the writer only writes
+            chunk = [
+                (artist, title, normalize_title(title), *self._compress(lyrics))
+                for artist, title, lyrics in islice(records, chunk_size)
+            ]
+            if not chunk:
+                break
+            report.new_artists += self._write_chunk(chunk, known_artists)
+            report.rows += len(chunk)
+        report.seconds = time.perf_counter() - start
+        logger.debug(
+            f"Inserted {report.rows} songs ({report.new_artists} new artists) "
+            f"in {report.seconds:.2f}s, {report.rows_per_second:.0f} rows/s"
+        )
+        return report
+
+    @_on_writer
+    def _write_chunk(self, chunk: list, known_artists: Dict[str, int]) -> int:
+        """Upsert one chunk of prepared rows in a transaction, returns how many artists were added"""
+        new_names = {row[0] for row in chunk if row[0] not in known_artists}
+        changes = self.conn.total_changes
+        with self.conn:
+            if new_names:
+                known_artists.update(self.resolve_artist_ids(new_names))
+            new_artists = self.conn.total_changes - changes
+            self.conn.executemany(
+                UPSERT_SONG,
+                [(title, normalized, known_artists[artist], data, dict_id)
+                 for artist, title, normalized, data, dict_id in chunk],
+            )
+        return new_artists
 
     def get_all_artists(self):
         """Gets all the names of artists present in the database"""
@@ -94,57 +633,193 @@ class LyricsDb:
         return self.conn_cursor.fetchall()
     
     def get_all_songs(self):
-        """Get all songs present in the database"""
+        """Get (id, title, artist id) of all songs present in the database, get_lyrics reads the text"""
 
-        self.conn_cursor.execute("SELECT * FROM songs")
+        self.conn_cursor.execute("SELECT id, title, artist_id FROM songs")
         return self.conn_cursor.fetchall()
 
+    def iter_artists(self, batch_size: int = LISTING_BATCH_SIZE) -> Iterator[tuple]:
+        """Yield (id, name) of every artist by name, batch_size rows per query"""
+        rows, after = self.artists_page(None, batch_size)
+        while rows:
+            yield from rows
+            if after is None:
+                break
+            rows, after = self.artists_page(after, batch_size)
+
+    def artists_page(self, after: Optional[str] = None, limit: int = 50) -> Tuple[List[tuple], Optional[str]]:
+        """
+        One page of (id, name) rows ordered by name, starting after the artist named after.
+        Returns the rows and the key of the next page, None on the last one.
+        The page is found through the name index, so page 1000 is as cheap as page 1.
+        """
+        if after is None:
+            rows = self.conn.execute("SELECT id, name FROM artists ORDER BY name LIMIT ?", (limit,)).fetchall()
+        else:
+            rows = self.conn.execute(
+                "SELECT id, name FROM artists WHERE name > ? ORDER BY name LIMIT ?", (after, limit)
+            ).fetchall()
+        return rows, rows[-1][1] if len(rows) == limit else None
+
+    def iter_songs(self, batch_size: int = LISTING_BATCH_SIZE) -> Iterator[tuple]:
+        """Yield (id, title, artist id) of every song by title, batch_size rows per query"""
+        rows, after = self.songs_page(None, batch_size)
+        while rows:
+            yield from rows
+            if after is None:
+                break
+            rows, after = self.songs_page(after, batch_size)
+
+    def songs_page(self, after: Optional[Tuple[str, int]] = None,
+                   limit: int = 50) -> Tuple[List[tuple], Optional[Tuple[str, int]]]:
+        """
+        One page of (id, title, artist id) rows ordered by title.
+        after is the (normalized title, artist id) key returned with the previous page, None for the first one.
+        """
+        if after is None:
+            rows = self.conn.execute(
+                """
+                    SELECT id, title, artist_id, normalized_title FROM songs
+                    ORDER BY normalized_title, artist_id LIMIT ?
+                """, (limit,)
+            ).fetchall()
+        else:
+            rows = self.conn.execute(
+                """
+                    SELECT id, title, artist_id, normalized_title FROM songs
+                    WHERE (normalized_title, artist_id) > (?, ?)
+                    ORDER BY normalized_title, artist_id LIMIT ?
+                """, (*after, limit)
+            ).fetchall()
+        next_after = (rows[-1][3], rows[-1][2]) if len(rows) == limit else None
+        return [row[:3] for row in rows], next_after
+
+    def iter_songs_by_artist_name(self, artist_name: str, batch_size: int = LISTING_BATCH_SIZE) -> Iterator[tuple]:
+        """Yield (id, title) of the songs by artist_name, batch_size rows per query"""
+        row = self.conn.execute("SELECT id FROM artists WHERE name = ?", (artist_name,)).fetchone()
+        if row is None:
+            return
+        after = ""
+        while True:
+            rows = self.conn.execute(
+                """
+                    SELECT id, title, normalized_title FROM songs
+                    WHERE artist_id = ? AND normalized_title > ?
+                    ORDER BY normalized_title LIMIT ?
+                """, (row[0], after, batch_size)
+            ).fetchall()
+            for song_id, title, _ in rows:
+                yield song_id, title
+            if len(rows) < batch_size:
+                break
+            after = rows[-1][2]
+
+    def iter_search_songs_by_title(self, keyword: str, batch_size: int = LISTING_BATCH_SIZE) -> Iterator[tuple]:
+        """
+        Yield (id, title) of the songs whose title matches keyword, best matches first.
+        Ranked results have no stable key to page on, the query stays open and is read batch_size rows at a time.
+        """
+        query = fts_query(keyword)
+        if not query:
+            return
+        cursor = self.conn.execute(
+            """
+                SELECT songs.id, songs.title
+                FROM songs_fts JOIN songs ON songs.id = songs_fts.rowid
+                WHERE songs_fts MATCH ?
+                ORDER BY songs_fts.rank
+            """, (f"title : ({query})",)
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
     def gets_songs_by_artist_name(self, artist_name:str):
-        """Gets song by specific artist name"""
+        """Gets (id, title) of the songs by specific artist name"""
 
         self.conn_cursor.execute(
             """
-                SELECT songs.title, songs.lyrics FROM songs JOIN artists ON songs.artist = artists.id WHERE artists.name = ?
+                SELECT songs.id, songs.title FROM songs JOIN artists ON songs.artist_id = artists.id WHERE artists.name = ?
             """, (artist_name,)
         )
         return self.conn_cursor.fetchall()
     
     def search_songs_by_title(self, keyword: str):
         """Search for songs by title (e.g 'find all songs with the title of  'love'.)"""
-
+        query = fts_query(keyword)
+        if not query:
+            return []
         self.conn_cursor.execute(
             """
-                SELECT title, lyrics FROM songs WHERE title like ?
-            """, (f"%{keyword}%",)
+                SELECT songs.id, songs.title
+                FROM songs_fts JOIN songs ON songs.id = songs_fts.rowid
+                WHERE songs_fts MATCH ?
+                ORDER BY songs_fts.rank
+            """, (f"title : ({query})",)
         )
         return self.conn_cursor.fetchall()
 
+    def search_lyrics(self, text: str, limit: int = 20, phrase: bool = False,
+                      highlight: Tuple[str, str] = ("[", "]")) -> List[tuple]:
+        """
+        Full-text search over titles, artists and lyrics, best matches first.
+        Returns (song id, title, artist, snippet) rows, the snippet is the best matching part
+        of the lyrics with the matched words wrapped in highlight.
+        """
+        query = fts_query(text, phrase)
+        if not query:
+            return []
+        start, end = highlight
+        try:
+            self.conn_cursor.execute(
+                """
+                    SELECT rowid, title, artist, snippet(songs_fts, 2, ?, ?, '…', 12)
+                    FROM songs_fts
+                    WHERE songs_fts MATCH ?
+                    ORDER BY bm25(songs_fts, 10.0, 5.0, 1.0)
+                    LIMIT ?
+                """, (start, end, query, limit)
+            )
+            return self.conn_cursor.fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error searching lyrics for '{text}': {e}")
+            return []
+
     def get_song_by_title_and_artist(self, title: str, artist_name: str) -> Optional[tuple]:
         """
-        Get a specific song and its lyrics by title and artist name.
+        Get a specific song and its lyrics by title and artist name, the title is matched as normalize_title does.
         Returns (title, lyrics) or None if not found.
         """
         try:
             self.conn_cursor.execute("""
-                SELECT songs.title, songs.lyrics
+                SELECT songs.title, songs.lyrics_z, songs.dict_id
                 FROM songs
                 JOIN artists ON songs.artist_id = artists.id
-                WHERE songs.title = ? AND artists.name = ?
-            """, (title, artist_name))
+                WHERE artists.name = ? AND songs.normalized_title = ?
+            """, (artist_name, normalize_title(title)))
             
-            result = self.conn_cursor.fetchone()  # Only one song expected
-            if result:
-                logging.debug(f"Found song: {result[0]} by {artist_name}")
-            else:
-                logging.debug(f"Song '{title}' by '{artist_name}' not found")
-            return result
+            row = self.conn_cursor.fetchone()  # (artist_id, normalized_title) is unique
+            if row is None:
+                logger.debug(f"Song '{title}' by '{artist_name}' not found")
+                return None
+            logger.debug(f"Found song: {row[0]} by {artist_name}")
+            return row[0], self._decompress(row[1], row[2])
         except Exception as e:
-            logging.error(f"Error retrieving song '{title}' by '{artist_name}': {e}")
+            logger.error(f"Error retrieving song '{title}' by '{artist_name}': {e}")
             return None
         
 
 class GeniusLyrics:
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: Path = ACCESS_TOKEN):
+        if not access_token.exists():
+            raise FileNotFoundError(f"Genius access token not found at {access_token}")
+        # lyricsgenius pulls in requests and BeautifulSoup, only pay for that when a remote client is made
+        import lyricsgenius
         self.genius = lyricsgenius.Genius(access_token.read_text().strip())
         self.genius.skip_non_songs = True
         self.genius.excluded_terms = ["(Remix)", "(Live)"]
@@ -157,8 +832,19 @@ class GeniusLyrics:
             return "Lyrics not found!"
         except Exception as e:
             return f"An error occurred: {e}"
+
+    def fetch_many(self, songs: Iterable[Tuple[str, str]], workers: int = 4, rate: float = 2.0,
+                   retries: int = 3) -> Iterator["FetchResult"]:
+        """
+        Look up many (title, artist) pairs concurrently, at most rate requests per second.
+        Results are yielded as they come in, not in the order of songs.
+        """
+        from lyrics_fetcher import GeniusTransport, LyricsFetcher
+        fetcher = LyricsFetcher(GeniusTransport(self.genius), workers=workers, rate=rate, retries=retries)
+        return fetcher.fetch_many(songs)
         
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG)
 
     lyrics_client = GeniusLyrics(ACCESS_TOKEN)
 
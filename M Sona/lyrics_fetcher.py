@@ -0,0 +1,177 @@
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TransientError(Exception):
+    """A lookup failed in a way that may work when tried again (timeout, rate limited, server error)"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LyricsTransport(ABC):
+    """
+    Where lyrics come from. fetch returns the lyrics, None when the song has none,
+    and raises TransientError when the lookup should be retried. Any other exception
+    is a failure that trying again won't fix.
+    Implementations are called from several worker threads at once.
+    """
+
+    @abstractmethod
+    def fetch(self, title: str, artist: str) -> Optional[str]:
+        """Lyrics of title by artist, None when it has none"""
+
+
+class GeniusTransport(LyricsTransport):
+    """Lookups through a lyricsgenius.Genius client"""
+
+    def __init__(self, genius):
+        # lyricsgenius is built on requests, it is there whenever a client is
+        import requests
+        self.genius = genius
+        self._requests = requests
+
+    def fetch(self, title: str, artist: str) -> Optional[str]:
+        requests = self._requests
+        try:
+            song = self.genius.search_song(title=title, artist=artist)
+        except (requests.Timeout, requests.ConnectionError, TimeoutError, ConnectionError) as e:
+            raise TransientError(f"Genius lookup failed: {e}") from e
+        except requests.HTTPError as e:
+            # lyricsgenius raises HTTPError(status code, message), auth and bad requests are final
+            status = e.args[0] if e.args and isinstance(e.args[0], int) else getattr(e.response, "status_code", None)
+            if status is not None and (status == 429 or status >= 500):
+                raise TransientError(f"Genius lookup failed: HTTP {status}") from e
+            raise
+        return song.lyrics if song else None
+
+
+class HttpTransport(LyricsTransport):
+    """
+    Lookups against a plain JSON endpoint: GET {base_url}/lyrics?title=..&artist=.. returning {"lyrics": "..."},
+    404 when there are none. Used to run the pipeline against a local stand-in server.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def fetch(self, title: str, artist: str) -> Optional[str]:
+        query = urllib.parse.urlencode({"title": title, "artist": artist})
+        try:
+            with urllib.request.urlopen(f"{self.base_url}/lyrics?{query}", timeout=self.timeout) as response:
+                return json.load(response).get("lyrics")
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            if e.code == 429 or e.code >= 500:
+                retry_after = e.headers.get("Retry-After")
+                raise TransientError(f"HTTP {e.code}", float(retry_after) if retry_after else None) from e
+            raise
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+            raise TransientError(str(e)) from e
+
+
+class TokenBucket:
+    """Allows rate calls per second on average, with bursts of up to capacity calls"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a call is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_for = (1 - self._tokens) / self.rate
+            # sleep outside the lock so other workers can refill and check too
+            time.sleep(wait_for)
+
+
+@dataclass
+class FetchResult:
+    title: str
+    artist: str
+    lyrics: Optional[str] = None   # None when the song has no lyrics or the lookup failed
+    error: Optional[str] = None    # why the lookup failed after all retries
+    attempts: int = 0
+
+
+class LyricsFetcher:
+    """
+    Looks up many songs at once: a pool of workers shares a token bucket so the remote API sees
+    at most rate requests per second, and failed lookups are retried with exponential backoff and jitter.
+    """
+
+    def __init__(self, transport: LyricsTransport, workers: int = 8, rate: float = 5.0,
+                 burst: Optional[float] = None, retries: int = 3, backoff: float = 0.5, max_backoff: float = 30.0):
+        self.transport = transport
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def fetch(self, title: str, artist: str) -> FetchResult:
+        result = FetchResult(title, artist)
+        while True:
+            self.bucket.acquire()
+            result.attempts += 1
+            try:
+                result.lyrics = self.transport.fetch(title, artist)
+                return result
+            except TransientError as e:
+                if result.attempts > self.retries:
+                    result.error = str(e)
+                    logger.debug(f"Giving up on '{title}' by '{artist}' after {result.attempts} attempts: {e}")
+                    return result
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (result.attempts - 1)))
+                time.sleep(max(delay, e.retry_after or 0))
+            except Exception as e:
+                result.error = str(e)
+                logger.debug(f"Lookup of '{title}' by '{artist}' failed: {e}")
+                return result
+
+    def fetch_many(self, songs: Iterable[Tuple[str, str]]) -> Iterator[FetchResult]:
+        """
+        Look up (title, artist) pairs, yielding results as they complete rather than in input order.
+        Only a few lookups per worker are queued at a time, so songs can be a generator over a huge library.
+        """
+        songs = iter(songs)
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < self.workers * 2:
+                    song = next(songs, None)
+                    if song is None:
+                        exhausted = True
+                    else:
+                        pending.add(executor.submit(self.fetch, *song))
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield future.result()
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QAbstractItemView, QListWidget, QListWidgetItem
+
+from lrc import SyncedLyrics
+
+
+class LyricsPanel(QListWidget):
+    """
+    Lyrics of the playing track with the current line highlighted and kept in the middle.
+    set_position only does a binary search, the view is touched when the line actually changes.
+    """
+    seek_requested = Signal(int)  # ms, the user clicked a line
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lyrics: Optional[SyncedLyrics] = None
+        self._current = -1
+        self.setWordWrap(True)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setStyleSheet("""
+            QListWidget { background-color: #181818; color: #888; font-size: 15px; border: none; }
+            QListWidget::item { padding: 4px; }
+            QListWidget::item:selected { background: transparent; color: #ff9500; }
+        """)
+        self.itemClicked.connect(self._on_item_clicked)
+        self.set_lyrics(None)
+
+    def set_lyrics(self, lyrics: Optional[SyncedLyrics]):
+        self.lyrics = lyrics
+        self._current = -1
+        self.clear()
+        if not lyrics:
+            item = QListWidgetItem("No synced lyrics for this track")
+            item.setFlags(Qt.NoItemFlags)
+            item.setTextAlignment(Qt.AlignCenter)
+            self.addItem(item)
+            return
+        for line in lyrics.lines:
+            item = QListWidgetItem(line or "♪")
+            item.setTextAlignment(Qt.AlignCenter)
+            self.addItem(item)
+        self.scrollToTop()
+
+    def set_position(self, time_ms: int):
+        if not self.lyrics:
+            return
+        line = self.lyrics.line_at(time_ms)
+        if line == self._current:
+            return
+        self._current = line
+        if line < 0:
+            self.clearSelection()
+            self.scrollToTop()
+            return
+        self.setCurrentRow(line)
+        self.scrollToItem(self.item(line), QAbstractItemView.PositionAtCenter)
+
+    def _on_item_clicked(self, item):
+        if self.lyrics:
+            self.seek_requested.emit(self.lyrics.times[self.row(item)])
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from lyrics_extracter import LyricsDb, normalize_title
+from lyrics_fetcher import LyricsTransport, TransientError
+
+NEGATIVE_TTL = 7 * 24 * 3600  # seconds a "not found" answer from the remote is trusted
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LyricsStats:
+    """Where lookups were answered from and how long each source took"""
+    lookups: int = 0
+    memory_hits: int = 0
+    db_hits: int = 0
+    remote_hits: int = 0
+    negative_hits: int = 0   # known misses answered without asking the remote again
+    not_found: int = 0       # no source has lyrics, the remote (when there is one) included
+    errors: int = 0
+    seconds: Dict[str, float] = field(default_factory=dict)  # source -> total time spent answering from it
+    answers: Dict[str, int] = field(default_factory=dict)    # source -> lookups it answered, misses included
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups answered without a remote request"""
+        local = self.memory_hits + self.db_hits + self.negative_hits
+        return local / self.lookups if self.lookups else 0.0
+
+    def mean_latency_ms(self, source: str) -> float:
+        count = self.answers.get(source, 0)
+        return self.seconds.get(source, 0.0) * 1000 / count if count else 0.0
+
+
+class LyricsService:
+    """
+    Read-through lyrics lookups: an in-memory LRU first, then the SQLite store, then the remote.
+    Lyrics found remotely are written back to the store, songs the remote has no lyrics for are
+    remembered for negative_ttl seconds so they are not requested again on every play.
+    """
+
+    def __init__(self, db: LyricsDb, remote: Optional[LyricsTransport] = None,
+                 max_items: int = 256, negative_ttl: float = NEGATIVE_TTL, max_negative: int = 10_000):
+        self.db = db
+        self.remote = remote
+        self.max_items = max_items
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self.stats = LyricsStats()
+        self._lyrics = OrderedDict()   # key -> lyrics, most recently used last
+        self._misses = OrderedDict()   # key -> time the remote last had no lyrics
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(title: str, artist: str):
+        return artist, normalize_title(title)
+
+    def get_lyrics(self, title: str, artist: str) -> Optional[str]:
+        """Lyrics of the song, None when no source has them"""
+        key = self._key(title, artist)
+        start = time.perf_counter()
+        with self._lock:
+            self.stats.lookups += 1
+            lyrics = self._lyrics.get(key)
+            if lyrics is not None:
+                self._lyrics.move_to_end(key)
+                self._count("memory", start)
+                self.stats.memory_hits += 1
+                return lyrics
+
+        row = self.db.get_song_by_title_and_artist(title, artist)
+        if row and row[1]:
+            self._remember(key, row[1])
+            with self._lock:
+                self._count("db", start)
+                self.stats.db_hits += 1
+            return row[1]
+
+        with self._lock:
+            checked = self._misses.get(key)
+            if checked is not None:
+                if time.time() - checked < self.negative_ttl:
+                    self._count("negative", start)
+                    self.stats.negative_hits += 1
+                    return None
+                del self._misses[key]
+        if self.remote is None:
+            with self._lock:
+                self._count("db", start)
+                self.stats.not_found += 1
+            return None
+
+        try:
+            lyrics = self.remote.fetch(title, artist)
+        except TransientError as e:
+            # not remembered as a miss, the next lookup tries again
+            logger.debug(f"Could not fetch lyrics of '{title}' by '{artist}': {e}")
+            with self._lock:
+                self._count("remote", start)
+                self.stats.errors += 1
+            return None
+
+        if lyrics is None:
+            with self._lock:
+                self._misses[key] = time.time()
+                while len(self._misses) > self.max_negative:
+                    self._misses.popitem(last=False)
+                self._count("remote", start)
+                self.stats.not_found += 1
+            return None
+
+        self.db.bulk_insert_songs([(artist, title, lyrics)])
+        self._remember(key, lyrics)
+        with self._lock:
+            self._count("remote", start)
+            self.stats.remote_hits += 1
+        return lyrics
+
+    def forget(self, title: str, artist: str):
+        """Drop the cached answer for a song, e.g. after its lyrics were edited"""
+        key = self._key(title, artist)
+        with self._lock:
+            self._lyrics.pop(key, None)
+            self._misses.pop(key, None)
+
+    def _remember(self, key, lyrics: str):
+        with self._lock:
+            self._lyrics[key] = lyrics
+            self._lyrics.move_to_end(key)
+            while len(self._lyrics) > self.max_items:
+                self._lyrics.popitem(last=False)
+
+    def _count(self, source: str, start: float):
+        self.stats.seconds[source] = self.stats.seconds.get(source, 0.0) + time.perf_counter() - start
+        self.stats.answers[source] = self.stats.answers.get(source, 0) + 1
@@ -1,11 +1,9 @@
+import os
 import sys
-import random
 import vlc
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
 from PySide6.QtWidgets import (
     QApplication, QWidget, QPushButton, QVBoxLayout, QFileDialog,
-    QSlider, QLabel, QHBoxLayout, QListWidget, QCheckBox, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QTabWidget,QGraphicsScene, QGraphicsPixmapItem
+    QSlider, QLabel, QLineEdit, QHBoxLayout, QListView, QCheckBox, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QTabWidget,QGraphicsScene, QGraphicsPixmapItem
 )
 from PySide6.QtGui import QPixmap, QImage
 from PySide6.QtCore import Qt, QTimer
@@ -13,44 +11,24 @@ from PySide6.QtGui import QPixmap
 from PySide6.QtCore import Qt
 from pathlib import Path
 
-import math
-from PySide6.QtCore import Qt, QTimer, QPointF
-from PySide6.QtGui import QPainter, QPen, QColor
 from PySide6.QtWidgets import QWidget, QApplication
 
-class WaveformWidget(QWidget):
-    def __init__(self):
-        super().__init__()
-        self.phase = 0
-        self.amplitude = 50  # default wave height
-
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_animation)
-        self.timer.start(10)
-
-    def setAmplitude(self, amplitude):
-        self.amplitude = max(10, min(amplitude, 100))
-
-    def update_animation(self):
-        self.phase += 0.1
-        self.update()
+from art_cache import AlbumArtCache
+from library import AUDIO_EXTENSIONS, LibraryScanner
+from lrc import load_lrc_for
+from lyrics_panel import LyricsPanel
+from metadata import MetadataPool
+from playback import GaplessPlayer
+from playlist_model import PlaylistModel, TrackStore
+from search import SearchIndex
+from shuffle import ShuffleQueue
+from waveform import PeakExtractor, WaveformWidget
 
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        pen = QPen(QColor("#00FFAA"), 2)
-        painter.setPen(pen)
+SEARCH_INDEX_BATCH = 500  # playlist rows indexed for search per event loop pass, ~10 ms
 
-        width = self.width()
-        height = self.height()
-        mid_y = height / 2
-
-        points = []
-        for x in range(width):
-            y = mid_y + math.sin((x / 30.0) + self.phase) * self.amplitude
-            points.append(QPointF(x, y))
-
-        painter.drawPolyline(points)
+def file_stem(path: str) -> str:
+    """File name without extension, os.path being much cheaper than Path for thousands of files"""
+    return os.path.splitext(os.path.basename(path))[0]
 
 class AlbumArtView(QGraphicsView):
     def __init__(self, image_path):
@@ -59,8 +37,8 @@ class AlbumArtView(QGraphicsView):
         self.scene = QGraphicsScene(self)
         self.setScene(self.scene)
 
-        pixmap = QPixmap(image_path)
-        self.pixmap_item = QGraphicsPixmapItem(pixmap)
+        self.default_pixmap = QPixmap(image_path)
+        self.pixmap_item = QGraphicsPixmapItem(self.default_pixmap)
         self.scene.addItem(self.pixmap_item)
 
         self.setAlignment(Qt.AlignCenter)
@@ -78,6 +56,15 @@ class AlbumArtView(QGraphicsView):
         super().resizeEvent(event)
         self.fitInView(self.pixmap_item, Qt.KeepAspectRatio)
 
+    def set_pixmap(self, pixmap):
+        self.pixmap_item.setPixmap(pixmap)
+        self.scene.setSceneRect(self.pixmap_item.boundingRect())
+        self.fitInView(self.pixmap_item, Qt.KeepAspectRatio)
+
+    def reset(self):
+        """Show the default cover again"""
+        self.set_pixmap(self.default_pixmap)
+
 class MusicPlayer(QWidget):
     def __init__(self):
         super().__init__()
@@ -105,22 +92,46 @@ class MusicPlayer(QWidget):
 
         # VLC Player Setup
         self.instance = vlc.Instance()
-        self.player = self.instance.media_player_new()
+        self.playback = GaplessPlayer(self.instance, self)
+        self.playback.track_switched.connect(self.on_track_switched)
+        self.playback.track_ended.connect(self.next_song)
+        # Seek bar follows VLC's position events, nothing polls the player
+        self.playback.position_changed.connect(self.update_seek)
 
         # Playlist
-        self.playlist = []
+        self.playlist = TrackStore()
         self.current_index = -1
         self.is_shuffling = False
+        self.shuffle = ShuffleQueue(album_of=self.album_key)
+        self.search_index = SearchIndex()
+        # rows are indexed for search a batch at a time after they are shown, the index lags the playlist
+        self.index_timer = QTimer(self)
+        self.index_timer.timeout.connect(self.index_next_rows)
         self.is_looping = False
+        self.queued_index = None
+        self.user_scans = set()  # folders the user added whose scan is still running
+
+        # Tags and covers are read off the GUI thread
+        self.metadata_pool = MetadataPool(self)
+        self.metadata_pool.tracks_ready.connect(self.on_tracks_ready)
+        self.art_cache = AlbumArtCache(self, self.metadata_pool.pool)
+        self.art_cache.art_ready.connect(self.on_art_ready)
+
+        # Library index, rescans only reread files that changed
+        self.library_scanner = LibraryScanner(self)
+        self.library_scanner.tracks_loaded.connect(self.add_tracks)
+        self.library_scanner.scan_finished.connect(self.on_scan_finished)
 
         # UI Elements
         self.btn_open = QPushButton("📂 Open Files")
+        self.btn_add_folder = QPushButton("📁 Add Folder")
         self.btn_play = QPushButton("▶ Play")
         self.btn_pause = QPushButton("⏸ Pause")
         self.btn_stop = QPushButton("⏹ Stop")
         self.btn_next = QPushButton("⏭ Next")
         self.btn_prev = QPushButton("⏮ Previous")
         self.shuffle_checkbox = QCheckBox("🔀 Shuffle")
+        self.shuffle_album_checkbox = QCheckBox("💿 By Album")
         self.loop_checkbox = QCheckBox("🔁 Loop")
 
         # Volume slider
@@ -136,45 +147,57 @@ class MusicPlayer(QWidget):
         self.seek_label = QLabel("0:00 / 0:00")
 
         # Playlist Widget
-        self.playlist_widget = QListWidget()
+        self.playlist_model = PlaylistModel(self.playlist, self)
+        self.playlist_widget = QListView()
+        self.playlist_widget.setModel(self.playlist_model)
+        self.playlist_widget.setUniformItemSizes(True)
         self.playlist_widget.setStyleSheet("background-color: #222; color: #fff; font-size: 14px;")
-        self.playlist_widget.itemDoubleClicked.connect(self.play_selected)
+        self.playlist_widget.doubleClicked.connect(self.play_selected)
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("🔍 Search title, artist, album...")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search_playlist)
         #Album art and sound wave container
         art_sound_container = QHBoxLayout()
         # Album Art Display
         img_path = Path(__file__).parent / "solitude album cover.png"
         self.album_art = AlbumArtView(img_path)
         # self.album_art.setMinimumSize(150, 80)
-        # self.sound_wave = WaveformWidget()
-        # self.sound_wave.setMinimumSize(180, 150)
-        # self.waveform_timer = QTimer(self)
-        # self.waveform_timer.setInterval(50)  # 20 times per second
-        # self.waveform_timer.timeout.connect(self.update_waveform_amplitude)
-        # self.waveform_timer.start()
+        self.sound_wave = WaveformWidget()
+        self.sound_wave.setMinimumSize(180, 150)
+        self.sound_wave.seek_requested.connect(self.seek_to_fraction)
+        self.peak_extractor = PeakExtractor(self)
+        self.peak_extractor.peaks_ready.connect(self.on_peaks_ready)
         # QGraphicsView()
         # self.album_scene = QGraphicsScene()
         # self.album_art.setScene(self.album_scene)
         # self.album_art.setFixedSize(150, 150)
         # self.album_art.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignTop)
         art_sound_container.addWidget(self.album_art)
-        # art_sound_container.addWidget(self.sound_wave)
+        art_sound_container.addWidget(self.sound_wave)
+
+        # Time-synced lyrics, follows the same position updates as the seek bar
+        self.lyrics_panel = LyricsPanel()
+        self.lyrics_panel.seek_requested.connect(self.playback.set_time)
         
         # self.album_art.setScaledContents(True);;
         
 
-        # Timer to update seek bar
-        self.timer = QTimer(self)
-        self.timer.setInterval(500)
-        self.timer.timeout.connect(self.update_seek)
-
         # Layout
         layout = QVBoxLayout()
         layout.addLayout(art_sound_container)
         # layout.addWidget(self.sound_wave)
 
 
-        tab2_layout.addWidget(self.playlist_widget)
-        tab2_layout.addWidget(self.btn_open)
+        playlist_layout = QVBoxLayout()
+        playlist_layout.addWidget(self.search_box)
+        playlist_layout.addWidget(self.playlist_widget)
+        tab2_layout.addLayout(playlist_layout)
+        tab2_buttons = QVBoxLayout()
+        tab2_buttons.addWidget(self.btn_open)
+        tab2_buttons.addWidget(self.btn_add_folder)
+        tab2_buttons.addStretch()
+        tab2_layout.addLayout(tab2_buttons)
         # tab2_layout.addWidget(self.sound_wave)
 
         controls_layout = QHBoxLayout()
@@ -197,6 +220,7 @@ class MusicPlayer(QWidget):
 
         shuffle_loop_layout = QHBoxLayout()
         shuffle_loop_layout.addWidget(self.shuffle_checkbox)
+        shuffle_loop_layout.addWidget(self.shuffle_album_checkbox)
         shuffle_loop_layout.addWidget(self.loop_checkbox)
         layout.addLayout(shuffle_loop_layout)
 
@@ -206,11 +230,13 @@ class MusicPlayer(QWidget):
 
         tab2.setLayout(tab2_layout)
         tabs.addTab(tab2, "Play List")
+        tabs.addTab(self.lyrics_panel, "Lyrics")
 
         # self.setLayout(layout)
 
         # Connect Signals
         self.btn_open.clicked.connect(self.open_files)
+        self.btn_add_folder.clicked.connect(self.add_folder)
         self.btn_play.clicked.connect(self.play_music)
         self.btn_pause.clicked.connect(self.pause_music)
         self.btn_stop.clicked.connect(self.stop_music)
@@ -219,6 +245,7 @@ class MusicPlayer(QWidget):
         self.volume_slider.valueChanged.connect(self.change_volume)
         self.seek_slider.sliderMoved.connect(self.set_position)
         self.shuffle_checkbox.stateChanged.connect(self.toggle_shuffle)
+        self.shuffle_album_checkbox.stateChanged.connect(self.toggle_shuffle)
         self.loop_checkbox.stateChanged.connect(self.toggle_loop)
 
         # Apply Dark Theme
@@ -230,29 +257,161 @@ class MusicPlayer(QWidget):
             QSlider::handle:horizontal { background: #ff9500; width: 10px; }
         """)
 
-    def update_waveform_amplitude(self):
-        if self.player.is_playing():
-            # Get current volume (0 to 100)
-            volume = self.player.audio_get_volume()
+        # Show the indexed library as it is read, then pick up changes on disk, all in the background
+        self.library_scanner.load()
 
-            amplitude = (volume / 100.0) * 50  # max amplitude 50
-            self.sound_wave.setAmplitude(amplitude)
-        else:
-            self.sound_wave.setAmplitude(10)  # idle small amplitude
+    def on_peaks_ready(self, file_path, peaks):
+        if 0 <= self.current_index < len(self.playlist) and self.playlist[self.current_index] == file_path:
+            self.sound_wave.set_peaks(peaks)
 
     def open_files(self):
         files, _ = QFileDialog.getOpenFileNames(self, "Open Music Files", "", "Audio Files (*.mp3 *.wav *.ogg *.flac  *.m4a)")
         if files:
-            self.playlist.extend(files)
-            for file in files:
-                self.playlist_widget.addItem(file.split("/")[-1])
+            self.add_files(files)
+
+    def add_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add Music Folder")
+        if folder:
+            self.user_scans.add(folder)
+            self.library_scanner.scan([folder])
+
+    def add_files(self, files):
+        """Append files to the playlist, their tags are filled in as the workers finish"""
+        first_row = len(self.playlist)
+        self.playlist_model.append_paths(files)
+        self.index_timer.start(0)
+        self.shuffle.extend(len(self.playlist))
+        self.metadata_pool.read_tags(enumerate(files, first_row))
+        self.start_if_idle()
+        self.requeue_next()
+
+    def add_tracks(self, tracks):
+        """Append tracks whose tags are already known, e.g. from the library"""
+        if not tracks:
+            return
+        self.playlist_model.append_tracks(tracks)
+        self.index_timer.start(0)
+        self.shuffle.extend(len(self.playlist))
+        self.requeue_next()
+
+    def requeue_next(self):
+        """Rows were appended after the current one, the track queued next may not be next anymore"""
+        # e.g. looping on the last track had queued row 0 instead of the first new row
+        self.queued_index = None
+        self.preload_next()
+
+    def album_key(self, row):
+        """Album of row for the shuffle, albums of the same name by different artists stay apart"""
+        album = self.playlist.albums[row]
+        if not album:
+            return None
+        # untagged compilations still hold together when they live in one folder
+        return self.playlist.album_artists[row] or os.path.dirname(self.playlist.paths[row]), album
+
+    def start_if_idle(self):
+        if self.current_index == -1 and self.playlist:
+            self.jump_to(0)
+
+    def on_scan_finished(self, root, result):
+        rows = {path: row for row, path in enumerate(self.playlist)}
+        new_tracks = []
+        changed_rows = []
+        for info in result.changed:
+            if info.path in rows:
+                self.update_track(rows[info.path], info)
+                changed_rows.append(rows[info.path])
+            else:
+                new_tracks.append(info)
+        self.playlist_model.rows_changed(changed_rows)
+        self.shuffle.tags_changed()
+        self.remove_rows([rows[path] for path in result.removed if path in rows])
+        self.add_tracks(new_tracks)
+        # only a folder the user just added starts playing, never the rescan at startup
+        if root in self.user_scans:
+            self.user_scans.discard(root)
+            self.start_if_idle()
+
+    def remove_rows(self, rows):
+        """Drop playlist rows of files that are gone from disk"""
+        if not rows:
+            return
+        new_rows = self.playlist.remove_rows(rows)
+        self.search_index.remove_rows(new_rows)
+        self.shuffle.rows_removed(new_rows, len(self.playlist))
+        if self.current_index >= 0:
+            # a deleted track that is playing plays on, the row after it comes next
+            current = self.current_index
+            while current >= 0 and new_rows[current] < 0:
+                current -= 1
+            self.current_index = new_rows[current] if current >= 0 else -1
+        self.queued_index = None
+        self.search_playlist(self.search_box.text())
+        self.preload_next()
+
+    def on_tracks_ready(self, results):
+        changed_rows = []
+        for row, info in results:
+            if row < len(self.playlist) and self.playlist[row] == info.path:
+                self.update_track(row, info)
+                changed_rows.append(row)
+        self.playlist_model.rows_changed(changed_rows)
+        self.shuffle.tags_changed()
+
+    def update_track(self, row, info):
+        self.playlist.update(row, info)
+        if row < len(self.search_index):
+            # rows not indexed yet are indexed from the playlist with their new tags
+            self.search_index.update(row, info.title, info.artist, info.album, file_stem(info.path))
+
+    def index_next_rows(self):
+        """Index the next SEARCH_INDEX_BATCH playlist rows for search and show those matching the query"""
+        first_row = len(self.search_index)
+        end = min(first_row + SEARCH_INDEX_BATCH, len(self.playlist))
+        playlist = self.playlist
+        self.search_index.add_many(
+            (playlist.titles[row], playlist.artists[row], playlist.albums[row], file_stem(playlist.paths[row]))
+            for row in range(first_row, end)
+        )
+        self.show_new_search_results(first_row)
+        if end == len(self.playlist):
+            self.index_timer.stop()
+
+    def search_playlist(self, query):
+        self.playlist_model.set_filter(self.search_index.search(query))
+        if self.current_index != -1:
+            self.select_current_row()
+
+    def show_new_search_results(self, first_row):
+        query = self.search_box.text()
+        if query.strip():
+            self.playlist_model.extend_filter(self.search_index.filter_rows(query, range(first_row, len(self.search_index))))
+
+    def select_current_row(self):
+        row = self.playlist_model.view_row(self.current_index)
+        if row >= 0:
+            self.playlist_model.ensure_loaded(row)
+            self.playlist_widget.setCurrentIndex(self.playlist_model.index(row))
+
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+
+    def dropEvent(self, event):
+        files = [url.toLocalFile() for url in event.mimeData().urls() if url.isLocalFile()]
+        files = [file for file in files if file.lower().endswith(AUDIO_EXTENSIONS)]
+        if files:
+            self.add_files(files)
+            event.acceptProposedAction()
 
-            if self.current_index == -1:
-                self.current_index = 0
-                self.load_song(self.playlist[self.current_index])
+    @property
+    def player(self):
+        """The VLC player of the track that is currently playing"""
+        return self.playback.player
 
     def play_music(self):
-        if self.player.get_state() == vlc.State.Ended:
+        if self.current_index == -1:
+            self.start_if_idle()
+        elif self.player.get_state() == vlc.State.Ended:
             self.next_song()
         else:
             self.player.play()
@@ -261,76 +420,137 @@ class MusicPlayer(QWidget):
         self.player.pause()
 
     def stop_music(self):
-        self.player.stop()
+        self.playback.stop()
         self.seek_slider.setValue(0)
         self.seek_label.setText("0:00 / 0:00")
 
-    def next_song(self):
-        if self.is_shuffling:
-            self.current_index = random.randint(0, len(self.playlist) - 1)
-        else:
-            self.current_index += 1
+    def peek_next_index(self):
+        """
+        Index of the track that comes after the current one, or None at the end of the playlist.
+        The choice is remembered so the preloaded track is the one next_song plays.
+        """
+        if self.queued_index is None and self.playlist:
+            if self.is_shuffling:
+                self.queued_index = self.shuffle.peek_next(loop=self.is_looping)
+            elif self.current_index + 1 < len(self.playlist):
+                self.queued_index = self.current_index + 1
+            elif self.is_looping:
+                self.queued_index = 0
+        return self.queued_index
+
+    def preload_next(self):
+        if self.current_index == -1:
+            # nothing to follow, don't let a track preloaded earlier take over at the end
+            self.playback.preload(None)
+            return
+        next_index = self.peek_next_index()
+        self.playback.preload(None if next_index is None else self.playlist[next_index])
 
-        if self.current_index < len(self.playlist):
-            self.load_song(self.playlist[self.current_index])
-        elif self.is_looping:
-            self.current_index = 0
+    def next_song(self):
+        next_index = self.peek_next_index()
+        if next_index is not None:
+            if self.is_shuffling:
+                self.shuffle.next(loop=self.is_looping)
+            self.current_index = next_index
             self.load_song(self.playlist[self.current_index])
 
     def prev_song(self):
-        if self.current_index > 0:
+        if self.is_shuffling:
+            # walk back through the tracks the shuffle actually played
+            previous = self.shuffle.previous()
+            if previous is not None:
+                self.current_index = previous
+                self.load_song(self.playlist[self.current_index])
+        elif self.current_index > 0:
             self.current_index -= 1
             self.load_song(self.playlist[self.current_index])
 
+    def jump_to(self, row):
+        """Play row because the user picked it, the shuffle continues from there"""
+        if self.is_shuffling:
+            self.shuffle.jump_to(row)
+        self.current_index = row
+        self.load_song(self.playlist[self.current_index])
+
     def load_song(self, file_path):
-        media = self.instance.media_new(file_path)
-        self.player.set_media(media)
-        self.player.play()
+        self.playback.load(file_path)
+        self.show_song(file_path)
+
+    def on_track_switched(self, file_path):
+        """The preloaded track took over at the end of the previous one"""
+        if self.queued_index is None:
+            # the queue changed after the track was preloaded, it is not the one that comes next
+            return
+        if self.is_shuffling:
+            self.shuffle.next(loop=self.is_looping)
+        self.current_index = self.queued_index
+        self.show_song(file_path)
+
+    def show_song(self, file_path):
+        self.queued_index = None
+        self.preload_next()
         self.seek_slider.setEnabled(True)
-        self.timer.start()
-        self.playlist_widget.setCurrentRow(self.current_index)
+        self.select_current_row()
         self.load_album_art(file_path)
+        self.sound_wave.set_peaks(self.peak_extractor.request(file_path))
+        self.lyrics_panel.set_lyrics(load_lrc_for(file_path))
 
     def change_volume(self, value):
-        self.player.audio_set_volume(value)
+        self.playback.set_volume(value)
         self.volume_label.setText(f"Volume: {value}%")
 
-    def update_seek(self):
-        if self.player.get_length() > 0:
-            pos = self.player.get_time() / self.player.get_length()
-            self.seek_slider.setValue(int(pos * 1000))
-            current_time = self.format_time(self.player.get_time())
-            total_time = self.format_time(self.player.get_length())
-            self.seek_label.setText(f"{current_time} / {total_time}")
+    def update_seek(self, time_ms, length_ms):
+        self.lyrics_panel.set_position(time_ms)
+        if length_ms > 0:
+            pos = time_ms / length_ms
+            if not self.seek_slider.isSliderDown():
+                self.seek_slider.setValue(int(pos * 1000))
+            self.sound_wave.set_position(pos)
+            self.seek_label.setText(f"{self.format_time(time_ms)} / {self.format_time(length_ms)}")
+        else:
+            self.seek_slider.setValue(0)
+            self.sound_wave.set_position(0)
+            self.seek_label.setText("0:00 / 0:00")
 
     def set_position(self, value):
-        if self.player.get_length() > 0:
-            self.player.set_time(int((value / 1000) * self.player.get_length()))
+        self.seek_to_fraction(value / 1000)
+
+    def seek_to_fraction(self, fraction):
+        if self.playback.length_ms > 0:
+            self.playback.set_time(int(fraction * self.playback.length_ms))
 
     def toggle_shuffle(self):
         self.is_shuffling = self.shuffle_checkbox.isChecked()
+        if self.is_shuffling:
+            self.shuffle.set_by_album(self.shuffle_album_checkbox.isChecked(), self.current_index)
+        self.queued_index = None
+        self.preload_next()
 
     def toggle_loop(self):
         self.is_looping = self.loop_checkbox.isChecked()
+        self.queued_index = None
+        self.preload_next()
 
     def load_album_art(self, file_path):
-        try:
-            audio = MP3(file_path, ID3=ID3)
-            for tag in audio.tags.values():
-                if isinstance(tag, APIC):
-                    pixmap = QPixmap()
-                    pixmap.loadFromData(tag.data)
-                    self.album_scene.clear()
-                    self.album_scene.addPixmap(pixmap)
-                    return
-        except Exception:
-            self.album_scene.clear()
+        pixmap = self.art_cache.get(file_path)
+        if pixmap is not None:
+            self.show_album_art(pixmap)
+
+    def on_art_ready(self, file_path, pixmap):
+        # Ignore covers that arrive after the user already moved on
+        if 0 <= self.current_index < len(self.playlist) and self.playlist[self.current_index] == file_path:
+            self.show_album_art(pixmap)
+
+    def show_album_art(self, pixmap):
+        if pixmap.isNull():
+            self.album_art.reset()
+        else:
+            self.album_art.set_pixmap(pixmap)
     
     def play_selected(self):
-        selected_item = self.playlist_widget.currentRow()
+        selected_item = self.playlist_widget.currentIndex().row()
         if selected_item >= 0:  # Ensure a valid selection
-            self.current_index = selected_item
-            self.load_song(self.playlist[self.current_index])
+            self.jump_to(self.playlist_model.store_row(selected_item))
 
 
     @staticmethod
@@ -342,4 +562,6 @@ if __name__ == "__main__":
     app = QApplication(sys.argv)
     player = MusicPlayer()
     player.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+    player.peak_extractor.shutdown()
+    sys.exit(exit_code)
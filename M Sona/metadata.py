@@ -0,0 +1,131 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+import mutagen
+from mutagen.id3 import APIC
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+@dataclass
+class TrackInfo:
+    """Tags and duration read from one audio file"""
+    path: str
+    title: str
+    artist: str = ""
+    album: str = ""
+    duration_ms: int = 0
+    album_artist: str = ""
+
+    def display_name(self) -> str:
+        """Text shown for the track in the playlist"""
+        name = f"{self.artist} - {self.title}" if self.artist else self.title
+        if self.duration_ms > 0:
+            seconds = self.duration_ms // 1000
+            name += f"  ({seconds // 60}:{seconds % 60:02d})"
+        return name
+
+
+def _first_tag(tags, key: str) -> str:
+    if not tags:
+        return ""
+    try:
+        value = tags.get(key)
+    except Exception:
+        return ""
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    return str(value or "").strip()
+
+
+def extract_art(audio) -> Optional[bytes]:
+    """Return the embedded cover image of a mutagen file object, if any"""
+    if audio is None:
+        return None
+    pictures = getattr(audio, "pictures", None)  # FLAC
+    if pictures:
+        return pictures[0].data
+    tags = audio.tags
+    if not tags:
+        return None
+    if "covr" in tags and tags["covr"]:  # MP4 / M4A
+        return bytes(tags["covr"][0])
+    for tag in tags.values():
+        if isinstance(tag, APIC):
+            return tag.data
+    return None
+
+
+def read_track_info(path: str) -> TrackInfo:
+    """Read title, artist, album, album artist and duration of an audio file"""
+    info = TrackInfo(path=path, title=Path(path).stem)
+    try:
+        audio = mutagen.File(path, easy=True)
+    except Exception as e:
+        logging.debug(f"Could not read tags of {path}: {e}")
+        return info
+    if audio is None:
+        return info
+    info.title = _first_tag(audio.tags, "title") or info.title
+    info.artist = _first_tag(audio.tags, "artist")
+    info.album = _first_tag(audio.tags, "album")
+    info.album_artist = _first_tag(audio.tags, "albumartist")
+    if audio.info is not None and getattr(audio.info, "length", 0):
+        info.duration_ms = int(audio.info.length * 1000)
+    return info
+
+
+def read_album_art(path: str) -> Optional[bytes]:
+    """Read the raw embedded cover image of an audio file"""
+    try:
+        return extract_art(mutagen.File(path))
+    except Exception as e:
+        logging.debug(f"Could not read album art of {path}: {e}")
+        return None
+
+
+class _PoolSignals(QObject):
+    tracks_ready = Signal(list)  # list of (row, TrackInfo)
+
+
+class _TagJob(QRunnable):
+    def __init__(self, signals: _PoolSignals, rows: list):
+        super().__init__()
+        self.signals = signals
+        self.rows = rows
+
+    def run(self):
+        results = [(row, read_track_info(path)) for row, path in self.rows]
+        self.signals.tracks_ready.emit(results)
+
+
+class MetadataPool(QObject):
+    """
+    Reads tags and durations on a worker pool.
+    Results are streamed back to the GUI thread in batches through Qt signals.
+    """
+    tracks_ready = Signal(list)
+
+    def __init__(self, parent=None, max_workers: Optional[int] = None, batch_size: int = 64):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_workers:
+            self.pool.setMaxThreadCount(max_workers)
+        self.batch_size = batch_size
+        self._signals = _PoolSignals()
+        self._signals.tracks_ready.connect(self.tracks_ready)
+
+    def read_tags(self, rows: Iterable[tuple]):
+        """Queue (row, path) pairs, results arrive through tracks_ready"""
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.pool.start(_TagJob(self._signals, batch))
+                batch = []
+        if batch:
+            self.pool.start(_TagJob(self._signals, batch))
+
+    def wait_for_done(self, msecs: int = -1) -> bool:
+        return self.pool.waitForDone(msecs)
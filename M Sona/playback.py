@@ -0,0 +1,164 @@
+import logging
+from typing import Optional
+
+import vlc
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QGuiApplication
+
+
+class GaplessPlayer(QObject):
+    """
+    Two VLC media players that take turns.
+    While one plays, the other holds the next queued track already opened and parsed,
+    so moving on at the end of a track is a swap instead of opening a new file.
+
+    Position, length and state come from the VLC event manager instead of polling.
+    Position updates are coalesced to at most one per display frame, and only while playing.
+    """
+    track_switched = Signal(str)        # the preloaded track took over at the end of the previous one
+    track_ended = Signal()              # a track ended with nothing preloaded
+    position_changed = Signal(int, int)  # time, length in ms
+    playing_changed = Signal(bool)
+    _end_reached = Signal(int)
+    _state_reported = Signal(int, bool)
+
+    def __init__(self, instance, parent=None):
+        super().__init__(parent)
+        self.instance = instance
+        self.players = [instance.media_player_new(), instance.media_player_new()]
+        self.active = 0
+        self.preloaded_path = None
+        self.time_ms = 0
+        self.length_ms = 0
+        self._position_dirty = False
+
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = (screen.refreshRate() if screen else 0) or 60
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setInterval(max(1, round(1000 / refresh_rate)))
+        self._frame_timer.timeout.connect(self._flush_position)
+
+        self._end_reached.connect(self._on_end_reached)
+        self._state_reported.connect(self._on_state_reported)
+        events = vlc.EventType
+        for index, player in enumerate(self.players):
+            manager = player.event_manager()
+            manager.event_attach(events.MediaPlayerEndReached, self._vlc_end_reached, index)
+            manager.event_attach(events.MediaPlayerTimeChanged, self._vlc_time_changed, index)
+            manager.event_attach(events.MediaPlayerLengthChanged, self._vlc_length_changed, index)
+            manager.event_attach(events.MediaPlayerPlaying, self._vlc_state_changed, index, True)
+            manager.event_attach(events.MediaPlayerPaused, self._vlc_state_changed, index, False)
+            manager.event_attach(events.MediaPlayerStopped, self._vlc_state_changed, index, False)
+
+    @property
+    def player(self):
+        """The player that is currently audible"""
+        return self.players[self.active]
+
+    @property
+    def standby(self):
+        return self.players[1 - self.active]
+
+    # The _vlc_* callbacks run on VLC threads and libvlc may not be called back from there.
+    # Time and length are only stored for the next frame, everything else is handed over to the Qt thread.
+
+    def _vlc_end_reached(self, event, index):
+        self._end_reached.emit(index)
+
+    def _vlc_time_changed(self, event, index):
+        if index == self.active:
+            self.time_ms = event.u.new_time
+            self._position_dirty = True
+
+    def _vlc_length_changed(self, event, index):
+        if index == self.active:
+            self.length_ms = event.u.new_length
+            self._position_dirty = True
+
+    def _vlc_state_changed(self, event, index, playing):
+        self._state_reported.emit(index, playing)
+
+    def _on_state_reported(self, index, playing):
+        if index != self.active:
+            return
+        if playing:
+            self._frame_timer.start()
+        else:
+            self._frame_timer.stop()
+            self._flush_position()
+        self.playing_changed.emit(playing)
+
+    def _flush_position(self):
+        if self._position_dirty:
+            self._position_dirty = False
+            self.position_changed.emit(self.time_ms, self.length_ms)
+
+    def _on_end_reached(self, index):
+        if index != self.active:
+            return
+        self._frame_timer.stop()
+        if self.length_ms:
+            self.time_ms = self.length_ms
+            self._position_dirty = True
+            self._flush_position()
+        if self.preloaded_path is None:
+            self.track_ended.emit()
+            return
+        path = self._swap()
+        self.track_switched.emit(path)
+
+    def _reset_position(self):
+        self.time_ms = 0
+        self.length_ms = 0
+        self._position_dirty = True
+        self._flush_position()
+
+    def _swap(self) -> str:
+        path = self.preloaded_path
+        self.preloaded_path = None
+        self.active = 1 - self.active
+        self._reset_position()
+        self.player.play()
+        return path
+
+    def load(self, path: str):
+        """Start playing path, using the preloaded copy when it is the one asked for"""
+        self.player.stop()
+        self._reset_position()
+        if path == self.preloaded_path:
+            self._swap()
+            return
+        media = self.instance.media_new(path)
+        self.player.set_media(media)
+        self.player.play()
+
+    def preload(self, path: Optional[str]):
+        """Open and parse path on the standby player so it can start without a gap"""
+        if path == self.preloaded_path:
+            return
+        self.preloaded_path = path
+        if path is None:
+            self.standby.set_media(None)
+            return
+        media = self.instance.media_new(path)
+        try:
+            media.parse_with_options(vlc.MediaParseFlag.local, 0)
+        except Exception as e:
+            logging.debug(f"Could not parse {path} ahead of time: {e}")
+        self.standby.set_media(media)
+
+    def set_volume(self, value: int):
+        for player in self.players:
+            player.audio_set_volume(value)
+
+    def stop(self):
+        for player in self.players:
+            player.stop()
+        self._frame_timer.stop()
+        self._reset_position()
+
+    def set_time(self, time_ms: int):
+        self.player.set_time(time_ms)
+        self.time_ms = time_ms
+        self._position_dirty = True
+        self._flush_position()
@@ -0,0 +1,183 @@
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Iterable, List
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from metadata import TrackInfo
+
+
+class TrackStore:
+    """
+    Columnar playlist storage, one list per field instead of one object per track.
+    Indexing it returns the track path so it can be used wherever the plain list of paths was.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.titles: List[str] = []   # empty until the tags were read
+        self.artists: List[str] = []
+        self.albums: List[str] = []
+        self.album_artists: List[str] = []
+        self.durations = array("l")   # milliseconds
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, row: int) -> str:
+        return self.paths[row]
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def extend_paths(self, paths: Iterable[str]):
+        """Add tracks whose tags are not known yet"""
+        paths = list(paths)
+        self.paths.extend(paths)
+        self.titles.extend([""] * len(paths))
+        self.artists.extend([""] * len(paths))
+        self.albums.extend([""] * len(paths))
+        self.album_artists.extend([""] * len(paths))
+        self.durations.extend([0] * len(paths))
+
+    def extend_tracks(self, tracks: Iterable[TrackInfo]):
+        for info in tracks:
+            self.paths.append(info.path)
+            self.titles.append(info.title)
+            # artist and album names repeat across many rows, keep a single copy of each
+            self.artists.append(sys.intern(info.artist))
+            self.albums.append(sys.intern(info.album))
+            self.album_artists.append(sys.intern(info.album_artist))
+            self.durations.append(info.duration_ms)
+
+    def remove_rows(self, rows: Iterable[int]) -> array:
+        """Drop rows, returns the new row of every old row (-1 for the dropped ones)"""
+        rows = set(rows)
+        new_rows = array("l")
+        keep = []
+        for row in range(len(self.paths)):
+            if row in rows:
+                new_rows.append(-1)
+            else:
+                new_rows.append(len(keep))
+                keep.append(row)
+        self.paths = [self.paths[row] for row in keep]
+        self.titles = [self.titles[row] for row in keep]
+        self.artists = [self.artists[row] for row in keep]
+        self.albums = [self.albums[row] for row in keep]
+        self.album_artists = [self.album_artists[row] for row in keep]
+        self.durations = array("l", [self.durations[row] for row in keep])
+        return new_rows
+
+    def update(self, row: int, info: TrackInfo):
+        self.titles[row] = info.title
+        self.artists[row] = sys.intern(info.artist)
+        self.albums[row] = sys.intern(info.album)
+        self.album_artists[row] = sys.intern(info.album_artist)
+        self.durations[row] = info.duration_ms
+
+    def info(self, row: int) -> TrackInfo:
+        path = self.paths[row]
+        title = self.titles[row] or os.path.splitext(os.path.basename(path))[0]
+        return TrackInfo(path, title, self.artists[row], self.albums[row], self.durations[row], self.album_artists[row])
+
+    def display_name(self, row: int) -> str:
+        if not self.titles[row]:
+            return os.path.basename(self.paths[row])
+        return self.info(row).display_name()
+
+
+class PlaylistModel(QAbstractListModel):
+    """
+    List model over a TrackStore.
+    Rows are handed to the view in batches as it scrolls and display text is built on demand,
+    so no per-row item objects exist. A filter (sorted store rows) limits the model to search results.
+    """
+    FETCH_SIZE = 2000
+
+    def __init__(self, store: TrackStore, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self._loaded = 0
+        self._filter = None
+
+    def _total(self) -> int:
+        return len(self.store) if self._filter is None else len(self._filter)
+
+    def store_row(self, row: int) -> int:
+        """Store row shown at row of the view"""
+        return row if self._filter is None else self._filter[row]
+
+    def view_row(self, store_row: int) -> int:
+        """Row of the view showing store_row, -1 if it is filtered out"""
+        if self._filter is None:
+            return store_row
+        i = bisect_left(self._filter, store_row)
+        return i if i < len(self._filter) and self._filter[i] == store_row else -1
+
+    def set_filter(self, rows):
+        """Only show rows (sorted store rows), None shows everything"""
+        self.beginResetModel()
+        self._filter = rows
+        self._loaded = 0
+        self.endResetModel()
+        self.fetchMore()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= self._loaded:
+            return None
+        if role == Qt.DisplayRole:
+            return self.store.display_name(self.store_row(index.row()))
+        if role == Qt.ToolTipRole:
+            return self.store.paths[self.store_row(index.row())]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()) -> bool:
+        return not parent.isValid() and self._loaded < self._total()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        self._fetch_to(min(self._total(), self._loaded + self.FETCH_SIZE))
+
+    def _fetch_to(self, count: int):
+        if count <= self._loaded:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, count - 1)
+        self._loaded = count
+        self.endInsertRows()
+
+    def ensure_loaded(self, row: int):
+        """Make sure row of the view is loaded, e.g. before selecting it"""
+        self._fetch_to(min(self._total(), row + 1))
+
+    def append_paths(self, paths: Iterable[str]):
+        self.store.extend_paths(paths)
+        self._show_first_batch()
+
+    def append_tracks(self, tracks: Iterable[TrackInfo]):
+        self.store.extend_tracks(tracks)
+        self._show_first_batch()
+
+    def extend_filter(self, rows: Iterable[int]):
+        """Show newly added store rows that match the current filter"""
+        if self._filter is not None:
+            self._filter.extend(rows)
+            self._show_first_batch()
+
+    def _show_first_batch(self):
+        # Only the rows the view has room for are inserted now, the rest is fetched while scrolling
+        if self._loaded < self.FETCH_SIZE:
+            self.fetchMore()
+
+    def rows_changed(self, rows: Iterable[int]):
+        """Repaint rows whose tags were updated, with a single signal"""
+        rows = [self.view_row(row) for row in rows]
+        rows = [row for row in rows if 0 <= row < self._loaded]
+        if rows:
+            self.dataChanged.emit(self.index(min(rows)), self.index(max(rows)), [Qt.DisplayRole])
@@ -0,0 +1,295 @@
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Lower case without accents, so "Beyoncé" is found by typing "beyonce" """
+    if text.isascii():
+        return text.lower()
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> List[str]:
+    return _WORD.findall(normalize(text))
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _char_masks(term: str) -> Dict[str, int]:
+    masks = {}
+    for i, char in enumerate(term):
+        masks[char] = masks.get(char, 0) | 1 << i
+    return masks
+
+
+def _is_typo_of(term: str, word: str, masks: Optional[Dict[str, int]] = None) -> bool:
+    """word is term with one typo (two from six letters on), or starts like that"""
+    limit = 1 if len(term) < 6 else 2
+    # each typo loses at most one letter of term
+    if len(word) < len(term) - limit or len(set(term).difference(word[:len(term) + limit])) > limit:
+        return False
+    return min(_edit_distances(term, masks or _char_masks(term), word)) <= limit
+
+
+def _edit_distances(term: str, masks: Dict[str, int], word: str) -> Tuple[int, int]:
+    """
+    Levenshtein distances of term to word and to word[:len(term)], in one pass over word.
+    Myers' bit-parallel algorithm: the column of distances to term is kept as bits of ints,
+    masks has the bits of the positions of each character in term.
+    """
+    length = len(term)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    plus, minus = full, 0
+    distance = prefix_distance = length
+    # only plus needs masking to the bits of term, the others stay within them or are masked by it
+    for i, char in enumerate(word):
+        equal = masks.get(char, 0)
+        vertical = equal | minus
+        horizontal = (((equal & plus) + plus) ^ plus) | equal
+        up = minus | ~(horizontal | plus)
+        down = plus & horizontal
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        up = (up << 1) | 1
+        plus = ((down << 1) | ~(vertical | up)) & full
+        minus = up & vertical
+        if i == length - 1:
+            prefix_distance = distance
+    if len(word) < length:
+        prefix_distance = distance
+    return distance, prefix_distance
+
+
+class SearchIndex:
+    """
+    In-memory search over title, artist, album and file name of every playlist row.
+    Each word typed matches the start of a word of the track, words without any such match
+    fall back to fuzzy matching (one or two typos). Tracks are indexed as they are added,
+    and a query that extends the previous one only filters the previous results.
+    """
+    SCAN_THRESHOLD = 256  # prefixes shared by more words than this are matched by scanning the rows
+    FUZZY_CACHE_SIZE = 64  # typed words whose fuzzy matches are kept up to date
+
+    def __init__(self):
+        self._postings: Dict[str, Set[int]] = {}   # token -> rows
+        self._tokens: List[str] = []               # sorted vocabulary for prefix lookups
+        self._new_tokens: List[str] = []           # words added since _tokens was last sorted
+        self._trigrams: Dict[str, Set[str]] = {}   # trigram -> tokens, for fuzzy matching
+        self._short_prefixes: Dict[str, Set[int]] = {}  # first one and two characters of a word -> rows
+        self._fuzzy_cache: Dict[str, Set[str]] = {}  # typed word -> words it fuzzy matches
+        self._haystacks: List[str] = []            # " token token ... " per row
+        self._last_terms: Optional[List[str]] = None
+        self._last_rows: Optional[array] = None
+
+    def __len__(self) -> int:
+        return len(self._haystacks)
+
+    def _index_tokens(self, row: int, tokens):
+        postings = self._postings
+        prefixes = self._short_prefixes
+        for token in tokens:
+            rows = postings.get(token)
+            if rows is None:
+                rows = postings[token] = set()
+                self._add_token(token)
+            rows.add(row)
+            prefixes.setdefault(token[:1], set()).add(row)
+            prefixes.setdefault(token[:2], set()).add(row)
+
+    def _add_token(self, token: str):
+        self._new_tokens.append(token)
+        if token.isdigit():
+            # a typo in a number is a different number, they are only matched exactly
+            return
+        for trigram in _trigrams(token):
+            self._trigrams.setdefault(trigram, set()).add(token)
+        for term, matches in self._fuzzy_cache.items():
+            if _is_typo_of(term, token):
+                matches.add(token)
+
+    def _forget_tokens(self, gone: List[str]):
+        """Drop words no row has anymore, so they neither match nor keep a word from fuzzy matching"""
+        if not gone:
+            return
+        for token in gone:
+            del self._postings[token]
+            for trigram in _trigrams(token):
+                tokens = self._trigrams.get(trigram)
+                if tokens is not None:
+                    tokens.discard(token)
+        gone = set(gone)
+        for matches in self._fuzzy_cache.values():
+            matches -= gone
+        if len(gone) > 16:
+            self._tokens = [token for token in self._tokens if token not in gone]
+            self._new_tokens = [token for token in self._new_tokens if token not in gone]
+            return
+        # a few words, e.g. after a retag: find them instead of copying the vocabulary
+        tokens = self._tokens
+        for token in gone:
+            i = bisect_left(tokens, token)
+            if i < len(tokens) and tokens[i] == token:
+                del tokens[i]
+            else:
+                self._new_tokens.remove(token)
+
+    def add(self, title: str, artist: str = "", album: str = "", file_name: str = "") -> int:
+        """Index a new row, rows are numbered in the order they are added"""
+        self.add_many([(title, artist, album, file_name)])
+        return len(self._haystacks) - 1
+
+    def add_many(self, records: Iterable[tuple]):
+        """Index (title, artist, album, file name) records as new rows"""
+        row = len(self._haystacks)
+        for title, artist, album, file_name in records:
+            tokens = tokenize(f"{title} {artist} {album} {file_name}")
+            self._haystacks.append(" " + " ".join(tokens) + " ")
+            self._index_tokens(row, set(tokens))
+            row += 1
+        self._last_terms = None
+
+    def update(self, row: int, title: str, artist: str = "", album: str = "", file_name: str = ""):
+        """Reindex a row whose tags changed"""
+        old_tokens = set(self._haystacks[row].split())
+        for token in old_tokens:
+            self._postings[token].discard(row)
+            self._short_prefixes[token[:1]].discard(row)
+            self._short_prefixes[token[:2]].discard(row)
+        tokens = tokenize(f"{title} {artist} {album} {file_name}")
+        self._haystacks[row] = " " + " ".join(tokens) + " "
+        self._index_tokens(row, set(tokens))
+        self._forget_tokens([token for token in old_tokens if not self._postings[token]])
+        self._last_terms = None
+
+    def remove_rows(self, new_rows):
+        """Rows were dropped, new_rows maps each old row to its new row or -1"""
+        self._haystacks = [haystack for row, haystack in enumerate(self._haystacks) if new_rows[row] >= 0]
+        gone = []
+        for token, rows in self._postings.items():
+            rows = {new_rows[row] for row in rows}
+            rows.discard(-1)
+            if rows:
+                self._postings[token] = rows
+            else:
+                gone.append(token)
+        for prefix, rows in self._short_prefixes.items():
+            rows = {new_rows[row] for row in rows}
+            rows.discard(-1)
+            self._short_prefixes[prefix] = rows
+        self._forget_tokens(gone)
+        self._last_terms = None
+
+    def _prefix_range(self, term: str):
+        if self._new_tokens:
+            # timsort merges the sorted vocabulary with the new words in close to linear time
+            self._tokens.extend(self._new_tokens)
+            self._tokens.sort()
+            self._new_tokens = []
+        return bisect_left(self._tokens, term), bisect_left(self._tokens, term + "\U0010ffff")
+
+    def _match_sets(self, terms: List[str]) -> Tuple[List[Set[int]], List[str], bool]:
+        """
+        The rows matching each term: those with a word starting with it, or its fuzzy matches
+        when no word does. Terms starting too many words for a union of their rows are returned
+        apart, to be looked for in the haystacks, and the flag is False when a term was fuzzy.
+        """
+        postings = self._postings
+        sets = []
+        scan = []
+        exact = True
+        for term in terms:
+            if len(term) <= 2:
+                rows = self._short_prefixes.get(term)
+            else:
+                start, end = self._prefix_range(term)
+                if end - start > self.SCAN_THRESHOLD:
+                    scan.append(term)
+                    continue
+                if end - start == 1:
+                    rows = postings[self._tokens[start]]
+                else:
+                    rows = set().union(*(postings[token] for token in self._tokens[start:end]))
+            if not rows:
+                exact = False
+                rows = self._fuzzy_rows(term)
+            sets.append(rows)
+        return sets, scan, exact
+
+    def _fuzzy_rows(self, term: str) -> Set[int]:
+        matches = self._fuzzy_cache.get(term)
+        if matches is None:
+            # words added later are matched against the cached terms as they come
+            limit = 1 if len(term) < 6 else 2
+            masks = _char_masks(term)
+            candidates = Counter(chain.from_iterable(self._trigrams.get(trigram, ()) for trigram in _trigrams(term)))
+            # each typo breaks at most three trigrams
+            matches = {
+                token for token, shared in candidates.items()
+                if shared >= len(term) - 3 * limit and _is_typo_of(term, token, masks)
+            }
+            if len(self._fuzzy_cache) >= self.FUZZY_CACHE_SIZE:
+                self._fuzzy_cache.clear()
+            self._fuzzy_cache[term] = matches
+        postings = self._postings
+        return set().union(*(postings[token] for token in matches))
+
+    def search(self, query: str) -> Optional[array]:
+        """Matching rows in playlist order, or None when the query is empty"""
+        terms = tokenize(query)
+        if not terms:
+            self._last_terms = None
+            return None
+
+        sets, scan, exact = self._match_sets(terms)
+        sets.sort(key=len)
+
+        last = self._last_terms
+        if (exact and last is not None and len(last) <= len(terms)
+                and all(new.startswith(old) for old, new in zip(last, terms))
+                and (not sets or len(self._last_rows) < len(sets[0]))):
+            # the query only grew and matched fewer rows than any word does now, narrow those
+            candidates = self._last_rows
+            for matches in sets:
+                candidates = [row for row in candidates if row in matches]
+        elif sets:
+            # intersection goes over the smaller set, so start from the smallest
+            candidates = sorted(sets[0].intersection(*sets[1:]))
+        else:
+            needle = " " + scan.pop()
+            candidates = [row for row, haystack in enumerate(self._haystacks) if needle in haystack]
+
+        # words starting too many others only filter what the rest matched, one tight pass each
+        haystacks = self._haystacks
+        for term in scan:
+            needle = " " + term
+            candidates = [row for row in candidates if needle in haystacks[row]]
+        rows = array("l", candidates)
+        self._last_terms = terms
+        self._last_rows = rows
+        return rows
+
+    def filter_rows(self, query: str, rows: Iterable[int]) -> List[int]:
+        """The rows among rows that search would find for query"""
+        sets, scan, _ = self._match_sets(tokenize(query))
+        haystacks = self._haystacks
+        rows = list(rows)
+        for matches in sets:
+            rows = [row for row in rows if row in matches]
+        for term in scan:
+            needle = " " + term
+            rows = [row for row in rows if needle in haystacks[row]]
+        return rows
@@ -0,0 +1,265 @@
+import random
+from array import array
+from typing import Callable, Dict, Hashable, List, Optional
+
+
+class LazyPermutation:
+    """
+    Random permutation of range(size) produced one element at a time.
+    It is a Fisher-Yates shuffle where only the swapped positions are stored, so creating it,
+    drawing from it and growing it are O(1) no matter how large size is.
+    """
+
+    def __init__(self, size: int = 0, rng: Optional[random.Random] = None):
+        self.size = size
+        self.drawn = 0
+        self.rng = rng or random.Random()
+        self._values: Dict[int, int] = {}     # position -> value, only where they differ
+        self._positions: Dict[int, int] = {}  # value -> position, only where they differ
+
+    @property
+    def remaining(self) -> int:
+        return self.size - self.drawn
+
+    def _value(self, position: int) -> int:
+        return self._values.get(position, position)
+
+    def _place(self, position: int, value: int):
+        if position == value:
+            self._values.pop(position, None)
+            self._positions.pop(value, None)
+        else:
+            self._values[position] = value
+            self._positions[value] = position
+
+    def _swap(self, a: int, b: int):
+        value_a, value_b = self._value(a), self._value(b)
+        self._place(a, value_b)
+        self._place(b, value_a)
+
+    def draw(self, avoid: Optional[int] = None) -> Optional[int]:
+        """Next value of the permutation, None once every value was drawn. avoid is skipped unless it is the last one left"""
+        if self.drawn >= self.size:
+            return None
+        if avoid is not None and self.remaining > 1 and not self.is_drawn(avoid):
+            position = self.rng.randrange(self.drawn, self.size - 1)
+            if position >= self._positions.get(avoid, avoid):
+                position += 1
+        else:
+            position = self.rng.randrange(self.drawn, self.size)
+        self._swap(self.drawn, position)
+        self.drawn += 1
+        return self._value(self.drawn - 1)
+
+    def undraw(self):
+        """Put the last drawn value back"""
+        if self.drawn:
+            self.drawn -= 1
+
+    def is_drawn(self, value: int) -> bool:
+        return self._positions.get(value, value) < self.drawn
+
+    def take(self, value: int):
+        """Mark value as drawn, e.g. when the user picked it by hand"""
+        if 0 <= value < self.size and not self.is_drawn(value):
+            self._swap(self.drawn, self._positions.get(value, value))
+            self.drawn += 1
+
+    def extend(self, size: int):
+        """New values join the ones that were not drawn yet, the order drawn so far stays as it is"""
+        self.size = max(self.size, size)
+
+    def reset(self, size: Optional[int] = None):
+        """Start over, optionally with a different size"""
+        if size is not None:
+            self.size = size
+        self.drawn = 0
+        self._values.clear()
+        self._positions.clear()
+
+
+class ShuffleQueue:
+    """
+    Shuffled play order over playlist rows with a history for going back.
+    Every row plays once per cycle. With by_album set, albums are shuffled instead
+    and the tracks of an album play in playlist order. album_of gives the album key of a row,
+    empty for tracks without an album.
+    """
+
+    def __init__(self, album_of: Callable[[int], Hashable], rng: Optional[random.Random] = None):
+        self.album_of = album_of
+        self.by_album = False
+        self.size = 0
+        self.order = LazyPermutation(rng=rng)
+        self.history = array("l")
+        self.position = -1
+        self._peeked = False
+        # album mode: order draws album groups instead of rows
+        self._groups: List[array] = []
+        self._group_of_row = array("l")
+        self._groups_dirty = True
+        self._played_albums = set()
+
+    def _album_key(self, row: int):
+        # tracks without an album tag are each treated as an album of their own
+        return self.album_of(row) or row
+
+    def extend(self, size: int):
+        """The playlist grew to size rows"""
+        self.size = size
+        if self.by_album:
+            self._groups_dirty = True
+        else:
+            self.order.extend(size)
+
+    def rows_removed(self, new_rows, size: int):
+        """
+        Rows were dropped from the playlist, new_rows maps each old row to its new row or -1.
+        The history keeps the rows that are left and a new cycle starts from the current one.
+        """
+        self._drop_peeked()
+        history = array("l")
+        position = -1
+        for i, row in enumerate(self.history):
+            if new_rows[row] >= 0:
+                history.append(new_rows[row])
+                if i <= self.position:
+                    position = len(history) - 1
+        self.history = history
+        self.position = position
+        self.size = size
+        self._groups_dirty = True
+        self._new_cycle()
+        current = self._current()
+        if current >= 0:
+            if self.by_album:
+                self._take_group_of(current)
+            else:
+                self.order.take(current)
+
+    def tags_changed(self):
+        """Albums may have changed, regroup before the next album is picked"""
+        if self.by_album:
+            self._groups_dirty = True
+
+    def set_by_album(self, by_album: bool, current: int = -1):
+        self.by_album = by_album
+        self._groups_dirty = True
+        self.restart(current)
+
+    def restart(self, current: int = -1):
+        """Start a new cycle, current (if any) counts as already played"""
+        self._drop_peeked()
+        self._new_cycle()
+        if current >= 0:
+            self.jump_to(current)
+
+    def _new_cycle(self):
+        self._played_albums.clear()
+        if self.by_album:
+            self._rebuild_groups()
+        else:
+            self.order.reset(self.size)
+
+    def _rebuild_groups(self):
+        """Group rows by album, O(n) but only done when albums changed and the next album is needed"""
+        keys = {}
+        self._groups = []
+        self._group_of_row = array("l", [0]) * self.size
+        for row in range(self.size):
+            key = self._album_key(row)
+            group = keys.get(key)
+            if group is None:
+                group = keys[key] = len(self._groups)
+                self._groups.append(array("l"))
+            self._groups[group].append(row)
+            self._group_of_row[row] = group
+        self._groups_dirty = False
+        self.order.reset(len(self._groups))
+        for key in self._played_albums:
+            if key in keys:
+                self.order.take(keys[key])
+
+    def _take_group_of(self, row: int):
+        if 0 <= row < self.size:
+            self.order.take(self._group_of_row[row])
+            self._played_albums.add(self._album_key(row))
+
+    def _drop_peeked(self):
+        if self._peeked:
+            row = self.history.pop()
+            self.order.undraw()
+            if self.by_album:
+                self._played_albums.discard(self._album_key(row))
+            self._peeked = False
+
+    def _current(self) -> int:
+        return self.history[self.position] if self.position >= 0 else -1
+
+    def _draw_next(self, loop: bool) -> Optional[int]:
+        current = self._current()
+        if not self.by_album:
+            row = self.order.draw()
+            if row is None and loop:
+                self._new_cycle()
+                row = self.order.draw(avoid=current if current >= 0 else None)
+            return row
+
+        if self._groups_dirty:
+            self._rebuild_groups()
+        if 0 <= current < self.size:
+            group = self._groups[self._group_of_row[current]]
+            index = group.index(current)
+            if index + 1 < len(group):
+                return group[index + 1]
+        group = self.order.draw()
+        if group is None and loop:
+            self._new_cycle()
+            avoid = self._group_of_row[current] if 0 <= current < self.size else None
+            group = self.order.draw(avoid=avoid)
+        if group is None:
+            return None
+        row = self._groups[group][0]
+        self._played_albums.add(self._album_key(row))
+        return row
+
+    def peek_next(self, loop: bool = False) -> Optional[int]:
+        """Row that next() will return, without moving"""
+        if self.position + 1 < len(self.history):
+            return self.history[self.position + 1]
+        drawn = self.order.drawn
+        row = self._draw_next(loop)
+        if row is None:
+            return None
+        self.history.append(row)
+        # only a row drawn from the order can be handed back, the next track of the same album can't
+        self._peeked = self.order.drawn > drawn
+        return row
+
+    def next(self, loop: bool = False) -> Optional[int]:
+        row = self.peek_next(loop)
+        if row is not None:
+            self.position += 1
+            # replaying forward after previous() leaves a drawn but unplayed row at the end
+            if self.position == len(self.history) - 1:
+                self._peeked = False
+        return row
+
+    def previous(self) -> Optional[int]:
+        if self.position <= 0:
+            return None
+        self.position -= 1
+        return self.history[self.position]
+
+    def jump_to(self, row: int):
+        """The user picked row by hand, continue the shuffle from there"""
+        self._drop_peeked()
+        del self.history[self.position + 1:]
+        if self.by_album:
+            if self._groups_dirty:
+                self._rebuild_groups()
+            self._take_group_of(row)
+        else:
+            self.order.take(row)
+        self.history.append(row)
+        self.position = len(self.history) - 1
@@ -0,0 +1,299 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+import shutil
+import struct
+import subprocess
+import wave
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from PySide6.QtCore import QObject, QPointF, QRectF, Qt, QTimer, Signal
+from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen
+from PySide6.QtWidgets import QWidget
+
+CACHE_DIR = Path(__file__).parent / "cache" / "peaks"
+SAMPLE_RATE = 11025   # tracks are decoded to mono at this rate, plenty for drawing
+BUCKET_SIZE = 256     # samples per peak at the most detailed level
+MIN_LEVEL_SIZE = 256  # stop halving once a level has fewer peaks than this
+READ_SIZE = 1 << 16
+
+_MAGIC = b"MSPK"
+_HEADER = struct.Struct("<4sBIIB")  # magic, version, sample rate, bucket size, level count
+_VERSION = 1
+
+
+class PeakData:
+    """
+    Min/max peaks of a track at several zoom levels.
+    Level 0 holds one (min, max) pair per BUCKET_SIZE samples, every next level halves the previous one.
+    Peaks are signed bytes stored interleaved as min, max, min, max...
+    """
+
+    def __init__(self, levels: List[array], sample_rate: int = SAMPLE_RATE, bucket_size: int = BUCKET_SIZE):
+        self.levels = levels
+        self.sample_rate = sample_rate
+        self.bucket_size = bucket_size
+
+    @property
+    def duration_ms(self) -> int:
+        return len(self.levels[0]) // 2 * self.bucket_size * 1000 // self.sample_rate if self.levels else 0
+
+    def level_for(self, width: int) -> array:
+        """The coarsest level that still has at least one peak per pixel"""
+        chosen = self.levels[0]
+        for level in self.levels[1:]:
+            if len(level) // 2 < width:
+                break
+            chosen = level
+        return chosen
+
+    def save(self, file: Path):
+        file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, self.sample_rate, self.bucket_size, len(self.levels)))
+            for level in self.levels:
+                f.write(struct.pack("<I", len(level)))
+                f.write(level.tobytes())
+        tmp_file.replace(file)
+
+    @classmethod
+    def load(cls, file: Path) -> Optional["PeakData"]:
+        try:
+            with open(file, "rb") as f:
+                magic, version, sample_rate, bucket_size, count = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC or version != _VERSION:
+                    return None
+                levels = []
+                for _ in range(count):
+                    (size,) = struct.unpack("<I", f.read(4))
+                    level = array("b")
+                    level.frombytes(f.read(size))
+                    levels.append(level)
+        except (OSError, struct.error, ValueError):
+            return None
+        return cls(levels, sample_rate, bucket_size)
+
+
+def cache_file_for(path: str, cache_dir: Path = CACHE_DIR) -> Path:
+    """Peak files are keyed by path, mtime and size so edited tracks are decoded again"""
+    stat = os.stat(path)
+    key = hashlib.sha1(f"{path}|{stat.st_mtime_ns}|{stat.st_size}".encode()).hexdigest()
+    return cache_dir / f"{key}.peaks"
+
+
+def _ffmpeg_chunks(ffmpeg: str, path: str):
+    process = subprocess.Popen(
+        [ffmpeg, "-v", "quiet", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE, stdin=subprocess.DEVNULL,
+    )
+    try:
+        while chunk := process.stdout.read(READ_SIZE):
+            yield chunk
+    finally:
+        process.stdout.close()
+        process.wait()
+
+
+def _wav_chunks(wav, step: int):
+    channels = wav.getnchannels()
+    with wav:
+        while frames := wav.readframes(READ_SIZE):
+            samples = array("h")
+            samples.frombytes(frames)
+            yield samples[::channels * step].tobytes()
+
+
+def _open_pcm(path: str):
+    """Return (sample rate, chunks) where chunks yields raw mono signed 16 bit PCM"""
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        return SAMPLE_RATE, _ffmpeg_chunks(ffmpeg, path)
+
+    # Without ffmpeg only plain 16 bit WAV files can be decoded
+    wav = wave.open(path, "rb")
+    if wav.getsampwidth() != 2:
+        wav.close()
+        raise ValueError("only 16 bit WAV files can be decoded without ffmpeg")
+    step = max(1, wav.getframerate() // SAMPLE_RATE)
+    return wav.getframerate() // step, _wav_chunks(wav, step)
+
+
+def _halve(level: array) -> array:
+    mins, maxs = level[0::2], level[1::2]
+    result = array("b")
+    for i in range(0, len(mins) - 1, 2):
+        result.append(min(mins[i], mins[i + 1]))
+        result.append(max(maxs[i], maxs[i + 1]))
+    if len(mins) % 2:
+        result.append(mins[-1])
+        result.append(maxs[-1])
+    return result
+
+
+def extract_peaks(path: str, cache_dir: Path = CACHE_DIR) -> Optional[str]:
+    """
+    Decode path once and store its peaks on disk, returns the peak file or None on failure.
+    Runs in a worker process, so it only deals in plain paths.
+    """
+    try:
+        target = cache_file_for(path, cache_dir)
+        if target.exists():
+            return str(target)
+
+        sample_rate, chunks = _open_pcm(path)
+        base = array("b")
+        pending = b""
+        bucket_bytes = BUCKET_SIZE * 2
+        for chunk in chunks:
+            pending += chunk
+            usable = len(pending) - len(pending) % bucket_bytes
+            samples = array("h")
+            samples.frombytes(pending[:usable])
+            pending = pending[usable:]
+            for i in range(0, len(samples), BUCKET_SIZE):
+                bucket = samples[i:i + BUCKET_SIZE]
+                base.append(min(bucket) >> 8)
+                base.append(max(bucket) >> 8)
+        if len(pending) >= 2:
+            samples = array("h")
+            samples.frombytes(pending[:len(pending) - len(pending) % 2])
+            base.append(min(samples) >> 8)
+            base.append(max(samples) >> 8)
+        if not base:
+            return None
+
+        levels = [base]
+        while len(levels[-1]) // 2 >= MIN_LEVEL_SIZE * 2:
+            levels.append(_halve(levels[-1]))
+        PeakData(levels, sample_rate).save(target)
+        return str(target)
+    except Exception as e:
+        logging.debug(f"Could not extract peaks of {path}: {e}")
+        return None
+
+
+class PeakExtractor(QObject):
+    """Decodes tracks in a background process and hands the cached peaks back to the GUI thread"""
+    peaks_ready = Signal(str, object)  # path, PeakData or None
+    _extracted = Signal(str, object)
+
+    def __init__(self, parent=None, cache_dir: Path = CACHE_DIR):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self._executor = None
+        self._pending = set()
+        self._failed = set()  # peak files of tracks that could not be decoded, keyed like the peaks
+        self._extracted.connect(self._on_extracted)
+
+    def request(self, path: str) -> Optional[PeakData]:
+        """Return the peaks of path if already on disk, otherwise start decoding it (peaks_ready is emitted when done)"""
+        try:
+            peak_file = cache_file_for(path, self.cache_dir)
+        except OSError:
+            return None
+        peaks = PeakData.load(peak_file)
+        if peaks is not None or peak_file in self._failed:
+            # a track that failed is only tried again once it changed on disk
+            return peaks
+        if path not in self._pending:
+            if self._executor is None:
+                # spawn rather than fork, forking a process that runs Qt threads can deadlock the child
+                self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            self._pending.add(path)
+            future = self._executor.submit(extract_peaks, path, self.cache_dir)
+            future.add_done_callback(lambda f, path=path, peak_file=peak_file: self._extracted.emit(path, (peak_file, f)))
+        return None
+
+    def _on_extracted(self, path, result):
+        expected_file, future = result
+        self._pending.discard(path)
+        peak_file = None if future.cancelled() or future.exception() else future.result()
+        if peak_file is None and not future.cancelled():
+            self._failed.add(expected_file)
+        self.peaks_ready.emit(path, PeakData.load(Path(peak_file)) if peak_file else None)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+class WaveformWidget(QWidget):
+    """Draws the real waveform of the current track with the playhead on top"""
+    seek_requested = Signal(float)  # fraction of the track
+    FRAME_INTERVAL = 33  # ms, repaint at most ~30 times a second
+
+    def __init__(self):
+        super().__init__()
+        self.peaks = None
+        self.position = 0.0
+        self._path = None
+        self._path_size = None
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.setInterval(self.FRAME_INTERVAL)
+        self._frame_timer.timeout.connect(self.update)
+
+    def set_peaks(self, peaks: Optional[PeakData]):
+        self.peaks = peaks
+        self.position = 0.0
+        self._path = None
+        self.update()
+
+    def set_position(self, fraction: float):
+        """Move the playhead, repaints are throttled and skipped while it stays on the same pixel"""
+        old_x = int(self.position * self.width())
+        self.position = max(0.0, min(fraction, 1.0))
+        if int(self.position * self.width()) != old_x and not self._frame_timer.isActive():
+            self._frame_timer.start()
+
+    def _build_path(self) -> QPainterPath:
+        width, height = self.width(), self.height()
+        mid_y = height / 2
+        scale = (height / 2) / 128
+        level = self.peaks.level_for(width)
+        count = len(level) // 2
+        path = QPainterPath()
+        for x in range(width):
+            start = x * count // width
+            end = max(start + 1, (x + 1) * count // width)
+            low = min(level[start * 2:end * 2:2])
+            high = max(level[start * 2 + 1:end * 2:2])
+            path.moveTo(x + 0.5, mid_y - high * scale)
+            path.lineTo(x + 0.5, mid_y - low * scale)
+        return path
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width, height = self.width(), self.height()
+        if not self.peaks or not self.peaks.levels[0] or width <= 0:
+            painter.setPen(QPen(QColor("#333"), 1))
+            painter.drawLine(0, height // 2, width, height // 2)
+            return
+
+        # The waveform only changes with the track or the widget size, the path is cached in between
+        if self._path is None or self._path_size != (width, height):
+            self._path = self._build_path()
+            self._path_size = (width, height)
+
+        playhead_x = self.position * width
+        painter.save()
+        painter.setClipRect(QRectF(0, 0, playhead_x, height))
+        painter.setPen(QPen(QColor("#00FFAA"), 1))
+        painter.drawPath(self._path)
+        painter.setClipRect(QRectF(playhead_x, 0, width - playhead_x, height))
+        painter.setPen(QPen(QColor("#2f6f5f"), 1))
+        painter.drawPath(self._path)
+        painter.restore()
+
+        painter.setPen(QPen(QColor("#ff9500"), 2))
+        painter.drawLine(QPointF(playhead_x, 0), QPointF(playhead_x, height))
+
+    def mousePressEvent(self, event):
+        if self.peaks and event.button() == Qt.LeftButton and self.width() > 0:
+            self.seek_requested.emit(max(0.0, min(event.position().x() / self.width(), 1.0)))
@@ -0,0 +1,194 @@
+import json
+import logging
+import os
+import queue
+import threading
+import zlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PySide6.QtGui import QTextCursor, QTextDocument
+
+COMPACT_BYTES = 256 * 1024  # journal size that triggers a fresh snapshot
+SNAPSHOT_EDIT = 64 * 1024   # edits adding more text than this are saved as a snapshot, not journaled
+
+logger = logging.getLogger(__name__)
+
+
+def _checksum(data: bytes) -> str:
+    return f"{len(data)}:{zlib.crc32(data):08x}"
+
+
+def _write_atomic(path: Path, data: bytes):
+    """Write to a temporary file and rename it over path, so path is always complete"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class AutosaveJournal:
+    """
+    Autosave of a QTextDocument as a snapshot plus a journal of the edits made since.
+    Edits are collected as (position, removed, added text) from contentsChange, flush() hands
+    them to a writer thread that appends them to the journal. Once the journal grows past
+    COMPACT_BYTES the document is written as a new snapshot (atomic rename) and the journal
+    starts over. The journal's header names the snapshot it applies to, so a crash at any
+    point leaves a snapshot and journal that recover() replays to the last flushed text.
+    """
+
+    def __init__(self, snapshot_path: Path, journal_path: Optional[Path] = None):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path.with_suffix(".journal")
+        self.document: Optional[QTextDocument] = None
+        self._edits: List[Tuple[int, int, str]] = []
+        self._needs_snapshot = False
+        self._journal_bytes = 0
+        self._jobs = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="Autosave writer", daemon=True)
+        self._writer.start()
+
+    def recover(self, document: QTextDocument) -> bool:
+        """
+        Load the snapshot into document and replay the journal on it, then start journaling
+        its edits. False when there was nothing saved.
+        """
+        try:
+            snapshot = self.snapshot_path.read_bytes()
+        except FileNotFoundError:
+            snapshot = None
+        if snapshot is not None:
+            document.setPlainText(snapshot.decode("utf-8", errors="replace"))
+            replayed = self._replay(document, snapshot)
+            document.clearUndoRedoStacks()
+        self.attach(document)
+        if snapshot is None or replayed != 0:
+            # fold the journal into the snapshot so the next start has nothing to replay,
+            # and new edits are never appended to a journal written for another snapshot
+            self._needs_snapshot = True
+            if snapshot is not None:
+                self.flush()
+        return snapshot is not None
+
+    def attach(self, document: QTextDocument):
+        self.document = document
+        document.contentsChange.connect(self._on_contents_change)
+
+    def flush(self):
+        """Hand the edits made since the last flush to the writer thread"""
+        if self._needs_snapshot or self._journal_bytes > COMPACT_BYTES:
+            self._edits = []
+            self._needs_snapshot = False
+            self._journal_bytes = 0
+            self._jobs.put(("snapshot", self.document.toPlainText()))
+            return
+        if not self._edits:
+            return
+        data = "".join(json.dumps(edit) + "\n" for edit in self._edits).encode("utf-8")
+        self._edits = []
+        self._journal_bytes += len(data)
+        self._jobs.put(("append", data))
+
+    def close(self):
+        """Flush pending edits and wait for the writer to finish"""
+        if not self._writer.is_alive():
+            return
+        if self.document is not None:
+            self.flush()
+        self._jobs.put(None)
+        self._writer.join()
+
+    def _on_contents_change(self, position: int, chars_removed: int, chars_added: int):
+        if self._needs_snapshot:
+            return
+        if chars_added > SNAPSHOT_EDIT:
+            # opening a file or pasting a large block: cheaper to snapshot than to journal
+            self._edits = []
+            self._needs_snapshot = True
+            return
+        added = ""
+        if chars_added:
+            cursor = QTextCursor(self.document)
+            end = min(position + chars_added, self.document.characterCount() - 1)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            added = cursor.selectedText().replace("\u2029", "\n")
+        self._merge_edit(position, chars_removed, added)
+
+    def _merge_edit(self, position: int, removed: int, added: str):
+        """
+        Record an edit, folding typing and backspacing into the previous edit.
+        Document positions count UTF-16 code units, so lengths are compared in those too.
+        """
+        if self._edits:
+            last_position, last_removed, last_added = self._edits[-1]
+            # surrogatepass: text set programmatically can hold a lone half of a pair
+            last_units = last_added.encode("utf-16-le", errors="surrogatepass")
+            end = last_position + len(last_units) // 2
+            if not removed and position == end:
+                self._edits[-1] = (last_position, last_removed, last_added + added)
+                return
+            if not added and position + removed == end and removed <= len(last_units) // 2:
+                kept = last_units[:len(last_units) - 2 * removed]
+                self._edits[-1] = (last_position, last_removed, kept.decode("utf-16-le", errors="surrogatepass"))
+                return
+        self._edits.append((position, removed, added))
+
+    def _replay(self, document: QTextDocument, snapshot: bytes) -> Optional[int]:
+        """Apply the journal's edits to document, the number of edits applied or None without a usable journal"""
+        try:
+            with open(self.journal_path, "rb") as f:
+                header = f.readline()
+                try:
+                    if json.loads(header).get("snapshot") != _checksum(snapshot):
+                        # left over from before the latest snapshot, which already has its edits
+                        return None
+                except ValueError:
+                    return None
+                cursor = QTextCursor(document)
+                last = document.characterCount() - 1
+                count = 0
+                cursor.beginEditBlock()
+                for line in f:
+                    try:
+                        position, removed, added = json.loads(line)
+                    except ValueError:
+                        # a record cut short by a crash, everything before it is intact
+                        break
+                    cursor.setPosition(min(position, last))
+                    cursor.setPosition(min(position + removed, last), QTextCursor.KeepAnchor)
+                    cursor.insertText(added)
+                    last = document.characterCount() - 1
+                    count += 1
+                cursor.endEditBlock()
+                return count
+        except FileNotFoundError:
+            return None
+
+    def _write_loop(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            try:
+                if job[0] == "append":
+                    with open(self.journal_path, "ab") as f:
+                        f.write(job[1])
+                        f.flush()
+                        os.fsync(f.fileno())
+                else:
+                    # surrogatepass: text set programmatically can hold a lone half of a pair
+                    self._write_snapshot(job[1].encode("utf-8", errors="surrogatepass"))
+            except (OSError, ValueError) as e:
+                # ValueError covers text that still can't be encoded, the thread must live on
+                logger.warning(f"Autosave failed: {e}")
+                # the journal may have missed edits, start over from the whole text
+                self._needs_snapshot = True
+
+    def _write_snapshot(self, snapshot: bytes):
+        """Replace the snapshot and start an empty journal for it"""
+        _write_atomic(self.snapshot_path, snapshot)
+        header = json.dumps({"snapshot": _checksum(snapshot)}) + "\n"
+        _write_atomic(self.journal_path, header.encode("utf-8"))
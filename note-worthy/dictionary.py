@@ -0,0 +1,145 @@
+"""
+Offline dictionary: WordNet definitions in a prebuilt, memory-mapped index.
+
+Build the index once (needs nltk and downloads WordNet if it is missing):
+
+    python dictionary.py
+
+Lookups binary search the mapped file and never import nltk.
+"""
+import mmap
+import struct
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+INDEX_FILE = Path(__file__).parent / "definitions.idx"
+MAX_DEFINITIONS = 3
+
+_MAGIC = b"NWDICT01"
+_HEADER = struct.Struct("<8sI")    # magic, entry count
+_ENTRY = struct.Struct("<IHII")    # key offset, key length, definitions offset, definitions length
+
+# WordNet's detachment rules (as used by morphy) to get from an inflected form to a lemma
+_SUFFIXES = [
+    ("s", ""), ("ses", "s"), ("xes", "x"), ("zes", "z"), ("ches", "ch"), ("shes", "sh"),
+    ("men", "man"), ("ies", "y"), ("es", "e"), ("es", ""), ("ed", "e"), ("ed", ""),
+    ("ing", "e"), ("ing", ""), ("er", ""), ("est", ""), ("er", "e"), ("est", "e"),
+]
+
+
+def build_index(path: Path = INDEX_FILE) -> int:
+    """Write the definitions of every WordNet lemma to path, the number of lemmas written"""
+    import nltk
+    from nltk.corpus import wordnet
+
+    nltk.download("wordnet", quiet=True)
+    entries = []
+    for lemma in wordnet.all_lemma_names():
+        definitions = [synset.definition() for synset in wordnet.synsets(lemma)[:MAX_DEFINITIONS]]
+        if definitions:
+            entries.append((lemma.encode("utf-8"), "\n".join(definitions).encode("utf-8")))
+    entries.sort()
+
+    keys_start = _HEADER.size + len(entries) * _ENTRY.size
+    values_start = keys_start + sum(len(key) for key, _ in entries)
+    table = bytearray()
+    keys = bytearray()
+    values = bytearray()
+    for key, value in entries:
+        table += _ENTRY.pack(keys_start + len(keys), len(key), values_start + len(values), len(value))
+        keys += key
+        values += value
+
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(entries)))
+        f.write(table)
+        f.write(keys)
+        f.write(values)
+    tmp_path.replace(path)
+    return len(entries)
+
+
+class DefinitionIndex:
+    """
+    Lemma -> definitions lookups in the file written by build_index. The file is mapped
+    on first use, so opening it is free, and recent answers are kept in a small LRU.
+    """
+
+    def __init__(self, path: Path = INDEX_FILE, max_items: int = 512):
+        self.path = path
+        self.max_items = max_items
+        self._map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._cache = OrderedDict()  # word -> definitions, most recently used last
+
+    def available(self) -> bool:
+        return self._map is not None or self.path.is_file()
+
+    def lookup(self, word: str) -> List[str]:
+        """Up to MAX_DEFINITIONS definitions of word or of its base form, [] when it is unknown"""
+        word = word.strip().lower().replace(" ", "_")
+        definitions = self._cache.get(word)
+        if definitions is not None:
+            self._cache.move_to_end(word)
+            return definitions
+
+        definitions = self._find(word)
+        if definitions is None:
+            for base in self._base_forms(word):
+                definitions = self._find(base)
+                if definitions is not None:
+                    break
+        definitions = definitions or []
+        self._cache[word] = definitions
+        while len(self._cache) > self.max_items:
+            self._cache.popitem(last=False)
+        return definitions
+
+    @staticmethod
+    def _base_forms(word: str):
+        for suffix, ending in _SUFFIXES:
+            if word.endswith(suffix) and len(word) > len(suffix) + 1:
+                stem = word[:len(word) - len(suffix)]
+                yield stem + ending
+                if not ending and stem[-1] == stem[-2]:
+                    # running -> run, bigger -> big
+                    yield stem[:-1]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _open(self) -> mmap.mmap:
+        if self._map is None:
+            with open(self.path, "rb") as f:
+                index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, count = _HEADER.unpack_from(index_map) if len(index_map) >= _HEADER.size else (None, 0)
+            if magic != _MAGIC or len(index_map) < _HEADER.size + count * _ENTRY.size:
+                index_map.close()
+                raise ValueError(f"{self.path} is not a complete dictionary index, rebuild it with: python dictionary.py")
+            self._map, self._count = index_map, count
+        return self._map
+
+    def _find(self, word: str) -> Optional[List[str]]:
+        index_map = self._open()
+        key = word.encode("utf-8")
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, key_length, value_offset, value_length = _ENTRY.unpack_from(
+                index_map, _HEADER.size + middle * _ENTRY.size)
+            candidate = index_map[key_offset:key_offset + key_length]
+            if candidate < key:
+                low = middle + 1
+            elif candidate > key:
+                high = middle
+            else:
+                return index_map[value_offset:value_offset + value_length].decode("utf-8").split("\n")
+        return None
+
+
+if __name__ == "__main__":
+    print(f"Wrote {build_index()} words to {INDEX_FILE}")
@@ -0,0 +1,208 @@
+import mmap
+import os
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtGui import QTextCursor, QTextDocument
+
+LOAD_CHUNK = 1 << 18         # characters inserted into the document per step, ~0.2 s in a shown QTextEdit
+SAVE_CHUNK = 1 << 20         # characters written per step
+PAGE_SIZE = 1 << 20          # bytes per page of a paged file
+LARGE_FILE = 50 * (1 << 20)  # files bigger than this can be opened paged instead
+
+
+class DocumentLoader(QObject):
+    """
+    Streams a text file into a QTextDocument LOAD_CHUNK characters at a time, one step per
+    event loop pass, so the window stays responsive and the file is never held twice in memory.
+    The document's previous text is put back when the load is cancelled or fails.
+    """
+    progress = Signal(int)   # percent
+    finished = Signal(bool)  # False when cancelled or the file could not be read
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document: Optional[QTextDocument] = None
+        self.error: Optional[OSError] = None
+        self._file = None
+        self._size = 0
+        self._previous: Optional[str] = None
+        self._cursor: Optional[QTextCursor] = None
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._step)
+
+    def start(self, path: str, document: QTextDocument):
+        self.document = document
+        self.error = None
+        try:
+            self._file = open(path, "r", encoding="utf-8", errors="replace")
+            self._size = os.fstat(self._file.fileno()).st_size
+        except OSError as e:
+            self._fail(e)
+            return
+        self._previous = document.toPlainText()
+        document.clear()
+        # a load is not something to undo keystroke by keystroke
+        document.setUndoRedoEnabled(False)
+        self._cursor = QTextCursor(document)
+        self._timer.start(0)
+
+    def cancel(self):
+        if self._file is not None:
+            self._restore()
+            self._finish(False)
+
+    def _step(self):
+        try:
+            chunk = self._file.read(LOAD_CHUNK)
+        except OSError as e:
+            self._restore()
+            self._fail(e)
+            return
+        if not chunk:
+            self._finish(True)
+            return
+        # the editor is read only while loading, so the cursor is still at the end
+        self._cursor.insertText(chunk)
+        if self._size:
+            self.progress.emit(min(100, self._file.buffer.tell() * 100 // self._size))
+
+    def _restore(self):
+        """Put back the text the document had before the load"""
+        self.document.setPlainText(self._previous)
+
+    def _fail(self, error: OSError):
+        self.error = error
+        self._finish(False)
+
+    def _finish(self, completed: bool):
+        self._timer.stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._cursor = None
+        self._previous = None
+        self.document.setUndoRedoEnabled(True)
+        self.finished.emit(completed)
+
+
+class DocumentSaver(QObject):
+    """
+    Writes a QTextDocument to a file block by block in steps of about SAVE_CHUNK characters.
+    The text goes to a temporary file renamed over the target at the end, so a cancelled or
+    failed save leaves the previous file as it was.
+    """
+    progress = Signal(int)   # percent
+    finished = Signal(bool)  # False when cancelled or the file could not be written
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.error: Optional[OSError] = None
+        self._path: Optional[Path] = None
+        self._tmp_path: Optional[Path] = None
+        self._file = None
+        self._block = None
+        self._blocks = 0
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._step)
+
+    def start(self, document: QTextDocument, path: str):
+        self.error = None
+        self._path = Path(path)
+        self._tmp_path = self._path.with_name(self._path.name + ".tmp")
+        self._block = document.begin()
+        self._blocks = document.blockCount()
+        try:
+            self._file = open(self._tmp_path, "w", encoding="utf-8")
+        except OSError as e:
+            self._fail(e)
+            return
+        self._timer.start(0)
+
+    def cancel(self):
+        if self._file is not None:
+            self._finish(False)
+
+    def _step(self):
+        lines = []
+        size = 0
+        block = self._block
+        while block.isValid() and size < SAVE_CHUNK:
+            # the same text toPlainText gives: soft line breaks and non-breaking spaces as plain ones
+            text = block.text().replace("\u2028", "\n").replace("\xa0", " ")
+            lines.append(text)
+            size += len(text) + 1
+            block = block.next()
+        try:
+            if self._block.blockNumber() > 0:
+                self._file.write("\n")
+            self._file.write("\n".join(lines))
+        except OSError as e:
+            self._fail(e)
+            return
+        self._block = block
+        if not block.isValid():
+            self._finish(True)
+            return
+        self.progress.emit(block.blockNumber() * 100 // self._blocks)
+
+    def _fail(self, error: OSError):
+        self.error = error
+        self._finish(False)
+
+    def _finish(self, completed: bool):
+        self._timer.stop()
+        self._block = None
+        try:
+            if self._file is not None:
+                self._file.close()
+            if completed:
+                os.replace(self._tmp_path, self._path)
+        except OSError as e:
+            self.error = e
+            completed = False
+        finally:
+            self._file = None
+        if not completed and self._tmp_path.exists():
+            self._tmp_path.unlink()
+        self.finished.emit(completed)
+
+
+class PagedFile:
+    """
+    Read-only, memory-mapped view of a large text file in pages of about PAGE_SIZE bytes.
+    Pages start after a line break, so only the pages shown are ever read or decoded.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self.size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-self.size // PAGE_SIZE))
+
+    def page(self, number: int) -> str:
+        if self._map is None:
+            return ""
+        start = self._page_start(number)
+        end = self._page_start(number + 1)
+        text = self._map[start:end].decode("utf-8", errors="replace").replace("\r\n", "\n")
+        # the line break ending the page belongs between it and the next one
+        return text[:-1] if text.endswith("\n") else text
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _page_start(self, number: int) -> int:
+        if number <= 0:
+            return 0
+        if number >= self.page_count:
+            return self.size
+        line_break = self._map.find(b"\n", number * PAGE_SIZE)
+        return self.size if line_break < 0 else line_break + 1
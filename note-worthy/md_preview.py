@@ -0,0 +1,142 @@
+import re
+from typing import Dict, List, Optional
+
+from markdown import Markdown
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import QTextBrowser, QTextEdit
+
+RENDER_DELAY = 150  # ms of typing quiet before the preview is rendered
+
+_FENCE = re.compile(r"^ {0,3}(```|~~~)")
+_CONTINUATION = re.compile(r"^(\s|[-*+]\s|\d+[.)]\s)")
+# reference links and footnotes are resolved across the whole document
+_REFERENCE = re.compile(r"^ {0,3}\[[^\]]+\]:", re.MULTILINE)
+
+
+def split_blocks(text: str) -> List[str]:
+    """
+    Split markdown into top level blocks that render on their own: paragraphs, headings,
+    whole fenced code blocks and whole lists (items and indented continuations stay together).
+    """
+    blocks = []
+    current = []
+    fence = None
+    blank = False
+    for line in text.split("\n"):
+        if fence:
+            current.append(line)
+            if line.lstrip().startswith(fence):
+                fence = None
+            continue
+        if not line.strip():
+            blank = True
+            current.append(line)
+            continue
+        if blank and current and not _CONTINUATION.match(line):
+            blocks.append("\n".join(current))
+            current = []
+        blank = False
+        match = _FENCE.match(line)
+        if match:
+            fence = match.group(1)
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+class MarkdownRenderer:
+    """
+    Renders markdown block by block and keeps the html of the last render,
+    so after an edit only the blocks whose text changed go through markdown again.
+    Not thread safe, one render at a time.
+    """
+
+    def __init__(self):
+        self._md = Markdown()
+        self._html: Dict[str, str] = {}  # block text -> html, blocks of the last render only
+
+    def render(self, text: str) -> str:
+        if _REFERENCE.search(text):
+            self._html = {}
+            self._md.reset()
+            return self._md.convert(text)
+
+        html = {}
+        parts = []
+        for block in split_blocks(text):
+            part = html.get(block)
+            if part is None:
+                part = self._html.get(block)
+            if part is None:
+                self._md.reset()
+                part = self._md.convert(block)
+            html[block] = part
+            parts.append(part)
+        self._html = html
+        return "\n".join(parts)
+
+
+class _RenderSignals(QObject):
+    rendered = Signal(str)  # html
+
+
+class _RenderJob(QRunnable):
+    def __init__(self, signals: _RenderSignals, renderer: MarkdownRenderer, text: str):
+        super().__init__()
+        self.signals = signals
+        self.renderer = renderer
+        self.text = text
+
+    def run(self):
+        self.signals.rendered.emit(self.renderer.render(self.text))
+
+
+class MarkdownPreview(QTextBrowser):
+    """
+    Markdown preview of a text edit. Edits are only noted while typing: the text is rendered
+    RENDER_DELAY ms after the last one, in the thread pool, and only while the preview is shown.
+    The scroll position is kept across updates.
+    """
+
+    def __init__(self, source: QTextEdit, parent=None, pool: Optional[QThreadPool] = None):
+        super().__init__(parent)
+        self.source = source
+        self.pool = pool or QThreadPool.globalInstance()
+        self._renderer = MarkdownRenderer()
+        self._dirty = True
+        self._running = False
+        self._signals = _RenderSignals()
+        self._signals.rendered.connect(self._on_rendered)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._render)
+
+    def request_render(self):
+        """The source changed, render it once typing pauses (or when the preview is shown)"""
+        self._dirty = True
+        if self.isVisible():
+            self._timer.start(RENDER_DELAY)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._dirty:
+            self._timer.start(0)
+
+    def _render(self):
+        if self._running or not self._dirty or not self.isVisible():
+            # a render in flight starts the next one when it finishes
+            return
+        self._dirty = False
+        self._running = True
+        self.pool.start(_RenderJob(self._signals, self._renderer, self.source.toPlainText()))
+
+    def _on_rendered(self, html: str):
+        self._running = False
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() > 0
+        position = scrollbar.value()
+        self.setHtml(html)
+        scrollbar.setValue(scrollbar.maximum() if at_bottom else position)
+        if self._dirty:
+            self._timer.start(RENDER_DELAY)
@@ -7,20 +7,21 @@ from PySide6.QtWidgets import (
                                 QTextEdit, QPushButton,
                                 QFileDialog,QMessageBox,
                                 QLabel,QComboBox,
-                                QLineEdit,QTextBrowser
+                                QLineEdit,QTextBrowser,
+                                QProgressDialog
                                 )
 from PySide6.QtGui import QFont,QIcon
 from pathlib import Path
-from markdown import markdown
 import shelve
-import nltk
-from nltk.corpus import wordnet
 import sys
 import json
 
-
-# Download WordNet if not already downloaded
-nltk.download('wordnet')
+from autosave import AutosaveJournal
+from dictionary import DefinitionIndex
+from file_io import LARGE_FILE, DocumentLoader, DocumentSaver
+from md_preview import MarkdownPreview
+from paged_view import PagedFileView
+from text_stats import DocumentStats
 
 CONFIG_FILE = "config.json"  # File to store user preferences
 
@@ -39,19 +40,22 @@ class NoteWorthy(QWidget):
 #===============================================================================================================================================
 #================================================================Text box=======================================================================
         self.text_edit = QTextEdit()
-        self.text_edit.textChanged.connect(self.update_word_count)
+        self.stats = DocumentStats(self.text_edit.document(), self)
+        self.stats.changed.connect(self.update_word_count)
         self.text_edit.textChanged.connect(self. _md_formatter)
         self.text_edit.textChanged.connect(self._restart_timer)
         self.text_edit.setPlaceholderText("Type your notes here...")
 
-        self.preview = QTextBrowser()      
+        self.preview = MarkdownPreview(self.text_edit)
         self.md_mode = False
 
         self.previous_text = True
+        self.file_task = None  # DocumentLoader/DocumentSaver running
 
         self.typing_timer = QTimer()
         self.typing_timer.setSingleShot(True)
         self.typing_timer.timeout.connect(self._autosave)
+        self.autosave = AutosaveJournal(Path(__file__).parent / "temp.txt")
 
 #===============================================================================================================================================
 #================================================================Sidebar Widget=================================================================
@@ -62,6 +66,10 @@ class NoteWorthy(QWidget):
         self.word_count_label = QLabel("Words: 0", self)
         self.v_layout = QVBoxLayout()
         self.v_layout.addWidget(self.text_edit)   
+        self.page_view = PagedFileView()
+        self.page_view.closed.connect(self._close_paged_file)
+        self.page_view.hide()
+        self.v_layout.addWidget(self.page_view)
         self.v_layout.addWidget(self.word_count_label)
 #===============================================================================================================================================
 #===============================================================Dictionary======================================================================
@@ -70,6 +78,7 @@ class NoteWorthy(QWidget):
 
         self.search_button = QPushButton("Get Definition", self)
         self.search_button.clicked.connect(self.get_definition)
+        self.dictionary = DefinitionIndex()
 
         self.definition_output = QLabel(self)
         self.definition_output.setWordWrap(True)
@@ -180,16 +189,66 @@ class NoteWorthy(QWidget):
         #Prompts the user for filename and location
         file_name, _ = QFileDialog.getSaveFileName(self, "save file", "", "Text Files (*.txt);;(*.html);;(*.csv);;(*.py);;(*.md)") 
 
-        if file_name:
-            with open(file_name, "w", encoding="utf-8") as file:
-                file.write(self.text_edit.toPlainText())
+        if file_name and self.file_task is None:
+            saver = DocumentSaver(self)
+            self._run_with_progress(saver, f"Saving {Path(file_name).name}...")
+            saver.start(self.text_edit.document(), file_name)
 
     def open_file(self):
         file_name, _ = QFileDialog.getOpenFileName(self, "save file", "", "Text Files (*.txt);;(*.html);;(*.csv);;(*.py);;(*.md)")
 
-        if file_name:
-            with open(file_name, "r", encoding="utf-8") as file:
-                self.text_edit.setText(file.read())
+        if not file_name or self.file_task is not None:
+            return
+        try:
+            large = Path(file_name).stat().st_size > LARGE_FILE
+        except OSError as e:
+            QMessageBox.warning(self, "Note Worthy", f"Could not open {file_name}: {e}")
+            return
+        if large and QMessageBox.question(
+                self, "Large file",
+                "This file is large. Open it read only, a page at a time?\n"
+                "Choose No to load all of it for editing.") == QMessageBox.Yes:
+            self._open_paged_file(file_name)
+            return
+
+        self.page_view.close_file()
+        loader = DocumentLoader(self)
+        self._run_with_progress(loader, f"Opening {Path(file_name).name}...")
+        loader.start(file_name, self.text_edit.document())
+
+    def _run_with_progress(self, task, label):
+        """Show a cancellable progress dialog for a DocumentLoader/DocumentSaver, the note stays read only meanwhile"""
+        dialog = QProgressDialog(label, "Cancel", 0, 100, self)
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(500)
+        task.progress.connect(dialog.setValue)
+        dialog.canceled.connect(task.cancel)
+        self.text_edit.setReadOnly(True)
+        self.file_task = task
+
+        def finished(completed):
+            self.file_task = None
+            self.text_edit.setReadOnly(False)
+            dialog.close()
+            dialog.deleteLater()
+            task.deleteLater()
+            if task.error is not None:
+                QMessageBox.warning(self, "Note Worthy", f"{label[:-3]} failed: {task.error}")
+
+        task.finished.connect(finished)
+
+    def _open_paged_file(self, file_name):
+        try:
+            self.page_view.open_file(file_name)
+        except OSError as e:
+            QMessageBox.warning(self, "Note Worthy", f"Could not open {file_name}: {e}")
+            return
+        self.text_edit.hide()
+        self.page_view.show()
+
+    def _close_paged_file(self):
+        self.page_view.hide()
+        self.text_edit.show()
 
     def about_noteWorthy(self):
          ret = QMessageBox.information(self,"About Note worthy",
@@ -203,18 +262,28 @@ class NoteWorthy(QWidget):
             self.definition_output.setText("⚠️ Please enter a word.")
             return
 
-        synsets = wordnet.synsets(word)
-        if synsets:
-            definitions = '\n'.join([f"• {s.definition()}" for s in synsets[:3]])  # Add bullet points
-            self.definition_output.setText(definitions)
+        rebuild = "⚠️ Dictionary not built yet, run: python dictionary.py"
+        if not self.dictionary.available():
+            self.definition_output.setText(rebuild)
+            return
+
+        try:
+            definitions = self.dictionary.lookup(word)
+        except (OSError, ValueError):
+            # a truncated or corrupt index, building it again fixes it; reopen it next time
+            self.dictionary.close()
+            self.definition_output.setText(rebuild)
+            return
+        if definitions:
+            self.definition_output.setText('\n'.join([f"• {d}" for d in definitions]))  # Add bullet points
         else:
             self.definition_output.setText("❌ No definition found.")
        
 
     def update_word_count(self):
-        text = self.text_edit.toPlainText()
-        words_num = len(text.split())
-        self.word_count_label.setText(f'Words: {str(words_num)}')
+        stats = self.stats
+        self.word_count_label.setText(f'Words: {stats.words} | Characters: {stats.characters} | '
+                                      f'Lines: {stats.lines} | {stats.reading_minutes} min read')
         
 
     def theme(self):
@@ -258,6 +327,7 @@ class NoteWorthy(QWidget):
         font = QFont("Arial", size)
         self.text_edit.setFont(font)
         self.preview.setFont(font)
+        self.page_view.text_view.setFont(font)
         self.font_size_box.setCurrentText(str(size))  # Ensure dropdown reflects the selection
 
     
@@ -294,32 +364,24 @@ class NoteWorthy(QWidget):
             self.md_btn.setText("Markdown ON")
    
     def _md_formatter(self):
-        md_text = self.text_edit.toPlainText()
-        html = markdown(md_text)
-        self.preview.setHtml(html)
+        self.preview.request_render()
         
     def _restart_timer(self):
         self.typing_timer.start(1000)  # Waits 10 seconds after last keypress
 
     def _autosave(self):
-        current_text = self.text_edit.toPlainText()
-        if current_text != getattr(self, "last_saved_text",""):
-            file = Path(__file__).parent / "temp.txt"
-            with open(file, "w", encoding="utf-8") as f:
-                f.write(current_text)
-            self.last_saved_text = current_text
+        self.autosave.flush()
 
     def _get_last_written(self):
-        file = Path(__file__).parent / "temp.txt"
-        try:
-            with open(file, "r", encoding="utf-8") as f:
-                text = f.read()
-            self.text_edit.setText(text)
+        if self.autosave.recover(self.text_edit.document()):
             self.previous_text = False
-        except FileNotFoundError:
-            return
+
+    def closeEvent(self, event):
+        self.autosave.close()
+        super().closeEvent(event)
         
     def exit_button(self):
+        self.autosave.close()
         self.destroy()
         sys.exit()
 #===============================================================================================================================================
@@ -0,0 +1,61 @@
+from typing import Optional
+
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QPlainTextEdit, QPushButton, QVBoxLayout, QWidget
+
+from file_io import PagedFile
+
+
+class PagedFileView(QWidget):
+    """Read-only view of a large file, one page of a PagedFile at a time"""
+    closed = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paged_file: Optional[PagedFile] = None
+        self.page_number = 0
+
+        self.text_view = QPlainTextEdit()
+        self.text_view.setReadOnly(True)
+        self.prev_button = QPushButton("◀")
+        self.prev_button.clicked.connect(lambda: self.show_page(self.page_number - 1))
+        self.next_button = QPushButton("▶")
+        self.next_button.clicked.connect(lambda: self.show_page(self.page_number + 1))
+        self.page_label = QLabel()
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.close_file)
+
+        bar = QHBoxLayout()
+        bar.addWidget(self.prev_button)
+        bar.addWidget(self.page_label)
+        bar.addWidget(self.next_button)
+        bar.addStretch()
+        bar.addWidget(self.close_button)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.text_view)
+        layout.addLayout(bar)
+
+    def open_file(self, path: str):
+        """Raises OSError when the file cannot be read"""
+        paged_file = PagedFile(path)
+        if self.paged_file is not None:
+            self.paged_file.close()
+        self.paged_file = paged_file
+        self.show_page(0)
+
+    def show_page(self, number: int):
+        if self.paged_file is None:
+            return
+        self.page_number = max(0, min(number, self.paged_file.page_count - 1))
+        self.text_view.setPlainText(self.paged_file.page(self.page_number))
+        self.page_label.setText(f"Page {self.page_number + 1} of {self.paged_file.page_count} (read only)")
+        self.prev_button.setEnabled(self.page_number > 0)
+        self.next_button.setEnabled(self.page_number < self.paged_file.page_count - 1)
+
+    def close_file(self):
+        if self.paged_file is not None:
+            self.paged_file.close()
+            self.paged_file = None
+        self.text_view.clear()
+        self.closed.emit()
@@ -0,0 +1,55 @@
+import os
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PySide6.QtCore import QEventLoop
+from PySide6.QtGui import QTextCursor, QTextDocument
+from PySide6.QtWidgets import QApplication
+
+from file_io import DocumentLoader, DocumentSaver
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+def run(task) -> bool:
+    """Wait for a DocumentLoader/DocumentSaver to finish, True when it completed"""
+    results = []
+    loop = QEventLoop()
+    task.finished.connect(results.append)
+    task.finished.connect(loop.quit)
+    loop.exec()
+    return results[0]
+
+
+def test_save_and_load_round_trip(app, tmp_path):
+    document = QTextDocument()
+    # Shift+Enter soft line break and a non-breaking space, as typed in the editor
+    QTextCursor(document).insertText("ab\u2028c\xa0d\nsecond line")
+    path = tmp_path / "note.txt"
+
+    saver = DocumentSaver()
+    saver.start(document, str(path))
+    assert run(saver)
+    assert path.read_text(encoding="utf-8") == document.toPlainText() == "ab\nc d\nsecond line"
+
+    loaded = QTextDocument()
+    loader = DocumentLoader()
+    loader.start(str(path), loaded)
+    assert run(loader)
+    assert loaded.toPlainText() == document.toPlainText()
+
+
+def test_cancelled_load_keeps_the_open_note(app, tmp_path):
+    path = tmp_path / "other.txt"
+    path.write_text("other note", encoding="utf-8")
+    document = QTextDocument()
+    document.setPlainText("open note")
+
+    loader = DocumentLoader()
+    loader.start(str(path), document)
+    loader.cancel()
+    assert document.toPlainText() == "open note"
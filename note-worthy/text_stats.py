@@ -0,0 +1,65 @@
+from array import array
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QTextDocument
+
+READING_SPEED = 200  # words per minute
+
+
+class DocumentStats(QObject):
+    """
+    Word, character and line counts of a QTextDocument, kept per block.
+    An edit only recounts the blocks in its contentsChange range, so the cost
+    of a keystroke does not grow with the size of the document.
+    """
+    changed = Signal()
+
+    def __init__(self, document: QTextDocument, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self._words = array("i")
+        self._chars = array("i")
+        self.words = 0
+        self.characters = 0  # line breaks not included
+        self._recount(0, 0, document.blockCount())
+        document.contentsChange.connect(self._on_contents_change)
+
+    @property
+    def lines(self) -> int:
+        return len(self._words)
+
+    @property
+    def reading_minutes(self) -> int:
+        if not self.words:
+            return 0
+        return max(1, round(self.words / READING_SPEED))
+
+    def _on_contents_change(self, position: int, chars_removed: int, chars_added: int):
+        document = self.document
+        first = document.findBlock(position)
+        last = document.findBlock(position + chars_added)
+        if not last.isValid():
+            last = document.lastBlock()
+        first_number = first.blockNumber() if first.isValid() else 0
+        # blocks after the change are unchanged, the old blocks in its range are the ones
+        # that are neither before it nor among the same number of blocks after it
+        removed_blocks = last.blockNumber() - first_number + 1 - (document.blockCount() - len(self._words))
+        self._recount(first_number, removed_blocks, last.blockNumber() + 1)
+        self.changed.emit()
+
+    def _recount(self, first: int, removed_blocks: int, end: int):
+        """Replace the counts of removed_blocks old blocks at first by those of blocks first..end-1"""
+        words = array("i")
+        chars = array("i")
+        block = self.document.findBlockByNumber(first)
+        for _ in range(first, end):
+            text = block.text()
+            words.append(len(text.split()))
+            chars.append(len(text))
+            block = block.next()
+
+        old = slice(first, first + removed_blocks)
+        self.words += sum(words) - sum(self._words[old])
+        self.characters += sum(chars) - sum(self._chars[old])
+        self._words[old] = words
+        self._chars[old] = chars